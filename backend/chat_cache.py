@@ -0,0 +1,209 @@
+"""
+Semantic response cache for first-turn /chat questions.
+
+Answers are keyed on the normalized question plus the user's CTS severity
+bucket. Besides exact matches, questions are embedded locally with feature
+hashing (word unigrams/bigrams and character trigrams into a fixed-size
+vector, no external service), so near-duplicates whose cosine similarity
+passes a threshold are answered from cache too, provided both questions have
+the same content words: negations such as "not" are content words, so
+"Is it safe to ..." never answers "Is it not safe to ...". Entries live in one
+preallocated NumPy matrix; the least recently used entry is evicted when it
+is full, and entries expire after a TTL.
+"""
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DIMENSIONS = 1024
+DEFAULT_THRESHOLD = 0.9
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Words a rewording may add or drop. Negations, question words and modals change
+# what is being asked, so they are deliberately not in here.
+STOPWORDS = frozenset("""
+a an the this that these those it its i me my we our you your he she they them their
+is am are was were be been being do does did have has had
+to of in on at by for with from about into over as and or if so than then
+there here please some any
+""".split())
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def severity_bucket(cts_data: Optional[dict]) -> str:
+    """CTS severity the answer was tailored to ("none" without health data)."""
+    if not cts_data:
+        return "none"
+    return str(cts_data.get("severity") or "unknown").strip().lower()
+
+
+def content_words(normalized: str) -> frozenset:
+    """Words of a normalized question other than stopwords."""
+    return frozenset(word for word in normalized.split() if word not in STOPWORDS)
+
+
+def _features(normalized: str) -> List[str]:
+    words = normalized.split()
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    padded = f" {normalized} "
+    features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+
+def embed(normalized: str, dimensions: int = DIMENSIONS) -> np.ndarray:
+    """L2-normalized hashed feature vector (signed hashing keeps collisions unbiased)."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature in _features(normalized):
+        h = zlib.crc32(feature.encode())
+        vector[h % dimensions] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ChatResponseCache:
+    """Bounded exact + similarity cache of chat answers."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 24 * 3600,
+        threshold: float = DEFAULT_THRESHOLD,
+        semantic: bool = True,
+        dimensions: int = DIMENSIONS,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.semantic = semantic
+        self.dimensions = dimensions
+
+        # Slot-indexed storage; a slot is free when its key is None
+        self._vectors = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._keys: List[Optional[tuple]] = [None] * max_entries
+        self._responses: List[Optional[str]] = [None] * max_entries
+        self._terms: List[Optional[frozenset]] = [None] * max_entries
+        self._bucket_codes = np.full(max_entries, -1, dtype=np.int32)
+        self._buckets: Dict[str, int] = {}
+        self._slots: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _bucket_code(self, bucket: str) -> int:
+        return self._buckets.setdefault(bucket, len(self._buckets))
+
+    def get(self, prompt: str, bucket: str) -> Optional[str]:
+        """Cached answer for a question, or None."""
+        normalized = normalize_prompt(prompt)
+        key = (normalized, bucket)
+        now = time.time()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None and self._expires[slot] > now:
+                self._last_used[slot] = now
+                self.exact_hits += 1
+                return self._responses[slot]
+
+            if self.semantic and self._slots and normalized:
+                live = (self._bucket_codes == self._buckets.get(bucket, -2)) & (self._expires > now)
+                candidates = np.flatnonzero(live)
+                if len(candidates):
+                    scores = self._vectors[candidates] @ embed(normalized, self.dimensions)
+                    terms = content_words(normalized)
+                    for best in np.argsort(-scores):
+                        if scores[best] < self.threshold:
+                            break
+                        slot = int(candidates[best])
+                        if self._terms[slot] == terms:
+                            self._last_used[slot] = now
+                            self.semantic_hits += 1
+                            return self._responses[slot]
+
+            self.misses += 1
+            return None
+
+    def put(self, prompt: str, bucket: str, response: str) -> None:
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return
+        key = (normalized, bucket)
+        now = time.time()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                free = np.flatnonzero(self._bucket_codes < 0)
+                if len(free):
+                    slot = int(free[0])
+                else:
+                    # Expired entries go first, then the least recently used
+                    slot = int(np.argmin(np.where(self._expires > now, self._last_used, -np.inf)))
+                    del self._slots[self._keys[slot]]
+                    self.evictions += 1
+            self._slots[key] = slot
+            self._keys[slot] = key
+            self._responses[slot] = response
+            self._terms[slot] = content_words(normalized)
+            self._vectors[slot] = embed(normalized, self.dimensions)
+            self._bucket_codes[slot] = self._bucket_code(bucket)
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._slots),
+                "max_entries": self.max_entries,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+                "semantic": self.semantic,
+                "threshold": self.threshold,
+            }
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Regression check: (cached question, lookup, should it be answered from cache).
+    # Every pair scores above DEFAULT_THRESHOLD, so the content-word guard decides.
+    CASES = [
+        ("Is it safe to fish in a storm?", "Is it not safe to fish in a storm?", False),
+        ("Should I wear gloves when handling fish with my CTS?",
+         "Should I not wear gloves when handling fish with my CTS?", False),
+        ("Why should I ice the catch after landing it on deck?",
+         "When should I ice the catch after landing it on deck?", False),
+        ("How should I store the fish I caught today before selling it at the market?",
+         "Where should I store the fish I caught today before selling it at the market?", False),
+        ("Should I keep fishing through the night if my wrist starts to hurt?",
+         "Could I keep fishing through the night if my wrist starts to hurt?", False),
+        ("Is it safe to fish in a storm?", "is it safe to fish in a storm", True),
+        ("Is it safe to fish in a storm?", "So is it safe to fish in a storm?", True),
+    ]
+    failures = 0
+    for cached, lookup, expected in CASES:
+        cache = ChatResponseCache(max_entries=8)
+        cache.put(cached, "none", "cached answer")
+        hit = cache.get(lookup, "none") is not None
+        if hit != expected:
+            failures += 1
+            print(f"FAIL: {lookup!r} {'hit' if hit else 'missed'} the answer cached for {cached!r}")
+    print(f"{len(CASES) - failures}/{len(CASES)} chat cache checks passed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,180 @@
+"""
+Server-side Gemini chat sessions for /chat.
+
+A session keeps the live Gemini chat and the system context (including the
+CTS block) for one conversation id, so a follow-up turn sends only the new
+message instead of rebuilding the whole history. Sessions are evicted LRU
+and after a TTL of inactivity. Once a conversation's estimated size passes a
+token budget, older turns are folded into a summary.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional
+
+# Rough size estimate: ~4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT = """Summarize the following conversation between a fisherman and an AI fishing assistant.
+Keep every fact, number, preference and health detail the assistant needs to continue helping.
+Answer with the summary only.
+
+{transcript}"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _turn(role: str, text: str) -> dict:
+    return {"role": role, "parts": [text]}
+
+
+class ChatSession:
+    """One conversation: live Gemini chat plus a mirror of its history."""
+
+    def __init__(self, session_id: str, model: Any, system_context: str, context_key: Optional[str], messages: List[dict]):
+        """messages are prior turns as {"role": "user" | "assistant", "content": ...}."""
+        self.id = session_id
+        self.model = model
+        self.system_context = system_context
+        self.context_key = context_key
+        self.history: List[dict] = []
+        context_sent = False
+        for msg in messages:
+            role = "user" if msg["role"] == "user" else "model"
+            text = msg["content"]
+            if role == "user" and not context_sent:
+                text = f"{system_context}\n\nUser: {text}"
+                context_sent = True
+            self.history.append(_turn(role, text))
+        self.message_count = len(messages)
+        self.chat = model.start_chat(history=list(self.history))
+        self.lock = threading.Lock()
+        self.summaries = 0
+        self.last_used = time.time()
+
+    @property
+    def tokens(self) -> int:
+        return sum(estimate_tokens(turn["parts"][0]) for turn in self.history)
+
+    def _prompt(self, message: str) -> str:
+        # The system context rides along with the first user turn
+        if any(turn["role"] == "user" for turn in self.history):
+            return message
+        return f"{self.system_context}\n\nUser: {message}"
+
+    def _record(self, prompt: str, reply: str) -> None:
+        self.history.append(_turn("user", prompt))
+        self.history.append(_turn("model", reply))
+        self.message_count += 2
+        self.last_used = time.time()
+
+    def send(self, message: str) -> str:
+        """Blocking round trip sending only the new message."""
+        with self.lock:
+            prompt = self._prompt(message)
+            reply = self.chat.send_message(prompt).text
+            self._record(prompt, reply)
+            return reply
+
+    def stream(self, message: str) -> Iterator[str]:
+        """Blocking iterator over partial replies; the turn is recorded once complete."""
+        with self.lock:
+            prompt = self._prompt(message)
+            parts = []
+            completed = False
+            try:
+                for chunk in self.chat.send_message(prompt, stream=True):
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        yield chunk.text
+                completed = True
+            finally:
+                if completed:
+                    self._record(prompt, "".join(parts))
+                else:
+                    # An abandoned stream leaves the Gemini chat mid-turn: restart it from the mirror
+                    self.chat = self.model.start_chat(history=list(self.history))
+
+    def compact(self, keep_turns: int = 2) -> bool:
+        """
+        Fold all but the last keep_turns exchanges into a summary.
+
+        The summary is carried in the first user turn together with the system
+        context. Returns False when there is too little history to shrink.
+        """
+        with self.lock:
+            keep = 2 * keep_turns
+            if len(self.history) <= keep + 2:
+                return False
+            older, recent = self.history[:-keep], self.history[-keep:]
+            transcript = "\n".join(
+                f"{'User' if turn['role'] == 'user' else 'Assistant'}: {turn['parts'][0]}" for turn in older
+            )
+            summary = self.model.generate_content(SUMMARY_PROMPT.format(transcript=transcript)).text
+            self.history = [
+                _turn("user", f"{self.system_context}\n\nSummary of the conversation so far:\n{summary}"),
+                _turn("model", "Understood. I'll keep that in mind."),
+            ] + recent
+            self.chat = self.model.start_chat(history=list(self.history))
+            self.summaries += 1
+            return True
+
+
+class ChatSessionStore:
+    """LRU of chat sessions with idle-time expiry."""
+
+    def __init__(self, max_sessions: int = 512, ttl: float = 1800, token_budget: int = 8000):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.evictions = 0
+
+    @staticmethod
+    def new_id() -> str:
+        return secrets.token_urlsafe(16)
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and session.last_used + self.ttl <= time.time():
+                del self._sessions[session_id]
+                self.evictions += 1
+                session = None
+            if session is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return session
+
+    def put(self, session: ChatSession) -> None:
+        with self._lock:
+            self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def over_budget(self, session: ChatSession) -> bool:
+        return session.tokens > self.token_budget
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rebuilds": self.rebuilds,
+                "evictions": self.evictions,
+                "summaries": sum(session.summaries for session in self._sessions.values()),
+                "token_budget": self.token_budget,
+            }
@@ -7,8 +7,9 @@ A minimal FastAPI that takes patient data and returns CTS severity predictions.
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Dict
+from typing import Dict, List
 import joblib
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
@@ -39,6 +40,15 @@ class PredictionResponse(BaseModel):
     probabilities: Dict[str, float]
     confidence: float
 
+class BatchPredictionRequest(BaseModel):
+    """Several patients screened in one request"""
+    patients: List[PatientData] = Field(..., min_length=1, max_length=10000)
+
+class BatchPredictionResponse(BaseModel):
+    """Predictions in the same order as the submitted patients"""
+    count: int
+    predictions: List[PredictionResponse]
+
 def load_model():
     """Load the trained model and metadata"""
     global model_data
@@ -92,9 +102,44 @@ async def root():
         "message": "CTS Severity Prediction API",
         "version": "1.0.0",
         "endpoint": "/predict - POST with patient data to get severity prediction",
+        "batch_endpoint": "/predict/batch - POST {\"patients\": [...]} to screen many patients in one pass",
         "docs": "/docs - API documentation"
     }
 
+def feature_matrix(patients: List[PatientData], feature_names: List[str]) -> np.ndarray:
+    """One row per patient, columns in the model's feature_names order"""
+    return np.array(
+        [[getattr(patient, name) for name in feature_names] for patient in patients],
+        dtype=np.float64,
+    ).reshape(len(patients), len(feature_names))
+
+def predict_matrix(model_info: dict, features: np.ndarray) -> List[PredictionResponse]:
+    """
+    Predict every row with a single predict_proba pass.
+
+    The class is the most probable one, which is exactly what the forest's
+    predict() returns, so the trees are evaluated only once.
+    """
+    model = model_info['model']
+    target_classes = model_info['target_classes']
+
+    # Models fitted on a DataFrame expect named columns; wrapping the matrix is zero-copy
+    if hasattr(model, 'feature_names_in_'):
+        features = pd.DataFrame(features, columns=model_info['feature_names'], copy=False)
+    probabilities = model.predict_proba(features)
+    predictions = model.classes_[np.argmax(probabilities, axis=1)]
+    confidences = probabilities.max(axis=1)
+
+    return [
+        PredictionResponse(
+            predicted_class=target_classes[prediction],
+            predicted_class_numeric=int(prediction),
+            probabilities={target_classes[i]: prob for i, prob in enumerate(row)},
+            confidence=confidence
+        )
+        for prediction, row, confidence in zip(predictions.tolist(), probabilities.tolist(), confidences.tolist())
+    ]
+
 @app.post("/predict", response_model=PredictionResponse)
 async def predict_severity(patient_data: PatientData):
     """
@@ -108,44 +153,32 @@ async def predict_severity(patient_data: PatientData):
     """
     try:
         model_info = load_model()
-        model = model_info['model']
-        feature_names = model_info['feature_names']
-        target_classes = model_info['target_classes']
-        
-        # Create DataFrame with patient data
-        input_data = pd.DataFrame([{
-            'age': patient_data.age,
-            'bmi': patient_data.bmi,
-            'sex': patient_data.sex,
-            'duration': patient_data.duration,
-            'nrs': patient_data.nrs,
-            'grip_strength': patient_data.grip_strength,
-            'pinch_strength': patient_data.pinch_strength
-        }])
-        
-        # Ensure correct column order
-        input_data = input_data[feature_names]
-        
-        # Make prediction
-        prediction = model.predict(input_data)[0]
-        probabilities = model.predict_proba(input_data)[0]
-        
-        # Format response
-        prob_dict = {target_classes[i]: float(prob) for i, prob in enumerate(probabilities)}
-        predicted_class = target_classes[prediction]
-        confidence = float(max(probabilities))
-        
-        return PredictionResponse(
-            predicted_class=predicted_class,
-            predicted_class_numeric=int(prediction),
-            probabilities=prob_dict,
-            confidence=confidence
-        )
+        features = feature_matrix([patient_data], model_info['feature_names'])
+        return predict_matrix(model_info, features)[0]
         
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_severity_batch(request: BatchPredictionRequest):
+    """
+    Predict CTS severity for a whole crew at once
+
+    All patients go into one feature matrix (in feature_names order) and the
+    forest runs a single predict_proba pass over it. Predictions are returned
+    in the order the patients were submitted.
+    """
+    try:
+        model_info = load_model()
+        features = feature_matrix(request.patients, model_info['feature_names'])
+        predictions = predict_matrix(model_info, features)
+        return BatchPredictionResponse(count=len(predictions), predictions=predictions)
+
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -1,111 +1,156 @@
-import pandas as pd
+import argparse
+import csv
 import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Share the column projection and dtypes with the API's occurrence store
+sys.path.append(str(Path(__file__).parent.parent))
+from occurrence.arrow import READ_DTYPES, finalize_table, frame_to_table, write_arrow
+from occurrence.segments import dataset_ids, new_segment_path
+from occurrence.store import FISH_CLASSES, OCCURRENCE_COLUMNS
+
+DATA_DIR = Path(__file__).parent
+
 
-def parse_occurrence_file(input_file, output_file):
+def convert_occurrence_chunks(input_file, chunksize=250_000):
     """
-    Parse the occurrence.txt file and save it in a more efficient format.
-    Keeps all columns from the original file.
+    Stream a GBIF occurrence.txt file into a typed Arrow table.
+
+    The tab-separated dump is read in chunks, pruned to the columns served by
+    fish_api.py and filtered to fish classes with coordinates, so the full
+    dump is never held in memory. Returns None when no fish records are found.
+    """
+    print(f"Reading {input_file} in chunks of {chunksize} rows...")
+    reader = pd.read_csv(
+        input_file,
+        sep='\t',
+        usecols=lambda col: col in OCCURRENCE_COLUMNS,
+        dtype=READ_DTYPES,
+        chunksize=chunksize,
+        quoting=csv.QUOTE_NONE,  # GBIF dumps are unquoted; stray quotes must not swallow lines
+    )
+
+    tables = []
+    rows_read = 0
+    rows_kept = 0
+    for chunk in reader:
+        rows_read += len(chunk)
+        for col in OCCURRENCE_COLUMNS:
+            if col not in chunk.columns:
+                chunk[col] = None
+
+        # Same filter the API applies: fish classes with coordinates only
+        chunk = chunk[
+            chunk['class'].isin(FISH_CLASSES)
+            & chunk['decimalLatitude'].notna()
+            & chunk['decimalLongitude'].notna()
+        ]
+        rows_kept += len(chunk)
+        if len(chunk):
+            tables.append(frame_to_table(chunk))
+        print(f"  {rows_read} rows read, {rows_kept} fish records kept")
+
+    return finalize_table(tables) if tables else None
+
+
+def print_summary(table, started):
+    print(f"\nSummary:")
+    print(f"  Fish records written: {table.num_rows}")
+    print(f"  Columns: {table.num_columns}")
+    print(f"  Elapsed: {time.time() - started:.1f}s")
+    print(f"  Null values per column:")
+    nulls = sorted(
+        ((name, table[name].null_count) for name in table.column_names if table[name].null_count),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    if nulls:
+        for name, count in nulls:
+            print(f"    {name}: {count}")
+    else:
+        print("    No missing values")
+
+
+def parse_occurrence_file(input_file, output_file, chunksize=250_000, compression=None):
     """
-    print(f"Reading {input_file}...")
+    Convert the full GBIF occurrence.txt dump into the base Arrow IPC dataset.
 
+    Low-cardinality strings are dictionary-encoded and coordinates/depths stored
+    as float32. Leave compression unset (or pass "zstd"/"lz4" for a smaller
+    file that can no longer be memory-mapped).
+    """
+    started = time.time()
     try:
-        # Read the tab-separated file
-        df = pd.read_csv(input_file, sep='\t', low_memory=False)
-
-        print(f"Successfully loaded {len(df)} rows and {len(df.columns)} columns")
-
-        # Keep only columns relevant for mapping fish locations
-        relevant_columns = [
-            # Identification
-            'id',
-            'catalogNumber',
-            'occurrenceID',
-
-            # Taxonomy - species identification
-            'scientificName',
-            'kingdom',
-            'phylum',
-            'class',
-            'order',
-            'family',
-            'genus',
-            'specificEpithet',
-            'vernacularName',
-
-            # Geographic location
-            'decimalLatitude',
-            'decimalLongitude',
-            'country',
-            'continent',
-            'waterBody',
-            'locality',
-            'stateProvince',
-            'county',
-            'island',
-            'islandGroup',
-
-            # Depth/elevation
-            'minimumDepthInMeters',
-            'maximumDepthInMeters',
-            'minimumElevationInMeters',
-            'maximumElevationInMeters',
-
-            # Date/time
-            'eventDate',
-            'year',
-            'month',
-            'day',
-
-            # Sample info
-            'individualCount',
-            'sex',
-            'lifeStage',
-            'occurrenceStatus',
-            'habitat',
-            'samplingProtocol',
-
-            # Quality/verification
-            'basisOfRecord',
-            'coordinateUncertaintyInMeters',
-        ]
+        table = convert_occurrence_chunks(input_file, chunksize)
+        if table is None:
+            print("No fish records found")
+            sys.exit(1)
 
-        # Filter to only columns that exist in the dataframe
-        existing_columns = [col for col in relevant_columns if col in df.columns]
-        df_filtered = df[existing_columns].copy()
+        print(f"\nSaving to {output_file}...")
+        write_arrow(table, output_file, compression=compression)
+        size_mb = Path(output_file).stat().st_size / 1024**2
+        print(f"Saved Arrow IPC file ({size_mb:.2f} MB, compression: {compression or 'none'})")
+        print_summary(table, started)
+        return table
 
-        print(f"\nFiltered to {len(df_filtered.columns)} relevant columns for fish mapping")
-        print(f"Columns kept: {list(df_filtered.columns)}")
-        print(f"\nFirst few rows:\n{df_filtered.head()}")
-        print(f"\nMemory usage: {df_filtered.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
-        # Use filtered dataframe
-        df = df_filtered
 
-        # Save as CSV for easy viewing
-        print(f"\nSaving to {output_file}...")
-        df.to_csv(output_file, index=False)
-        print(f"Saved as CSV format")
-
-        print(f"\nSummary:")
-        print(f"  Total rows: {len(df)}")
-        print(f"  Total columns: {len(df.columns)}")
-        print(f"  Missing values per column:")
-        missing = df.isnull().sum()
-        missing = missing[missing > 0].sort_values(ascending=False)
-        if len(missing) > 0:
-            print(missing.head(20))
-        else:
-            print("  No missing values")
-
-        return df
+def ingest_delta_file(input_file, base_file, segment_dir, chunksize=250_000):
+    """
+    Convert a GBIF delta export into a new immutable segment next to the base dataset.
+
+    Records whose id already exists in the base dataset or an earlier segment
+    (or repeats inside the delta) are dropped. A running fish_api.py picks the
+    segment up on its next poll and swaps in the extended store.
+    """
+    started = time.time()
+    try:
+        table = convert_occurrence_chunks(input_file, chunksize)
+        if table is None:
+            print("No fish records found in delta")
+            return None
+
+        ids = pd.Series(table['id'].to_numpy(zero_copy_only=False))
+        known = dataset_ids(base_file, segment_dir)
+        keep = ~ids.isin(known) & ~ids.duplicated()
+        print(f"\n{int((~keep).sum())} records already present, {int(keep.sum())} new")
+        if not keep.any():
+            return None
+        table = table.filter(keep.to_numpy())
+
+        # Written under a temporary name and renamed, so the API never sees a partial segment
+        output_file = new_segment_path(segment_dir)
+        write_arrow(table, output_file)
+        print(f"Saved segment {output_file}")
+        print_summary(table, started)
+        return table
 
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
-if __name__ == "__main__":
-    input_file = "/Users/reagan/Documents/GitHub/sushihacks2025/backend/occurrence.txt"
-    output_file = "/Users/reagan/Documents/GitHub/sushihacks2025/backend/occurrence_parsed.csv"
 
-    df = parse_occurrence_file(input_file, output_file)
-    print("\nDone!")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a GBIF occurrence.txt dump for fish_api.py")
+    parser.add_argument("input_file", nargs="?", default=str(DATA_DIR / "occurrence.txt"))
+    parser.add_argument("output_file", nargs="?", default=str(DATA_DIR / "occurrence.arrow"),
+                        help="Base dataset (written, or used for deduplication with --delta)")
+    parser.add_argument("--chunksize", type=int, default=250_000)
+    parser.add_argument("--compression", choices=["zstd", "lz4"], default=None)
+    parser.add_argument("--delta", action="store_true",
+                        help="Ingest input_file as a delta segment instead of rewriting the base dataset")
+    parser.add_argument("--segments", default=str(DATA_DIR / "segments"),
+                        help="Directory holding delta segments")
+    args = parser.parse_args()
+
+    if args.delta:
+        ingest_delta_file(args.input_file, args.output_file, args.segments, args.chunksize)
+    else:
+        parse_occurrence_file(args.input_file, args.output_file, args.chunksize, args.compression)
+    print("\nDone!")
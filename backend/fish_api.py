@@ -1,13 +1,17 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-import pandas as pd
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 import asyncio
 import httpx
+import json
 import os
+import secrets
+import time
 from dotenv import load_dotenv
 import google.generativeai as genai
 
@@ -16,8 +20,19 @@ load_dotenv()
 
 # Add fish_market directory to path to import fish_ranking and market_insight
 sys.path.append(str(Path(__file__).parent / "fish_market"))
-from fish_ranking import fish_ranking
+from fish_ranking import fish_ranking, fish_ranking_batch
 from market_insight import market_insight
+from insight_jobs import DONE, FAILED, InsightJob, InsightJobQueue
+from market_analytics import local_market_insight
+from places_cache import DETAILS_PATH, NEARBY_PATH, PlacesCache
+from occurrence import OccurrenceStore
+from occurrence.segments import apply_segments
+from occurrence.serialize import column_payload, dumps, ndjson_lines, record_rows
+from occurrence.store import RECORD_COLUMNS
+from occurrence.tiles import MAX_ZOOM, TilePyramid, load_or_build, tile_slug
+from singleflight import SingleFlight
+from chat_sessions import ChatSession, ChatSessionStore
+from chat_cache import ChatResponseCache, severity_bucket
 
 app = FastAPI()
 
@@ -30,14 +45,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load fish data once at startup
-FISH_DATA_PATH = Path(__file__).parent / "data" / "occurrence_parsed.csv"
-fish_df = None
+# Load fish data once at startup: the Arrow file from data/parse_occurrence.py is
+# memory-mapped; the legacy occurrence_parsed.csv is used when it is absent
+DATA_DIR = Path(__file__).parent / "data"
+FISH_DATA_PATH = Path(os.getenv(
+    "FISH_DATA_PATH",
+    DATA_DIR / "occurrence.arrow" if (DATA_DIR / "occurrence.arrow").exists() else DATA_DIR / "occurrence_parsed.csv",
+))
+store: OccurrenceStore | None = None
+
+# Delta segments written by `parse_occurrence.py --delta` are picked up without a restart
+SEGMENT_DIR = Path(os.getenv("FISH_SEGMENT_DIR", DATA_DIR / "segments"))
+SEGMENT_POLL_SECONDS = float(os.getenv("FISH_SEGMENT_POLL_SECONDS", "30"))
+segment_watcher: asyncio.Task | None = None
+
+# Optional shared-memory mode: workers attach to one published snapshot of the store
+# (e.g. FISH_SHARED_STORE=/dev/shm/fish-store) instead of each loading a private copy
+SHARED_STORE_DIR = os.getenv("FISH_SHARED_STORE")
+
+# Precomputed tile pyramids, one per fish type filter (built at startup for All Fish)
+TILE_DIR = DATA_DIR / "tiles"
+tile_pyramids: dict[str, TilePyramid] = {}
+
+# Rows serialized per chunk when streaming /fish-occurrences as NDJSON
+STREAM_CHUNK_ROWS = 2000
 
 # Google Maps API configuration
 MAPS_BASE = "https://maps.googleapis.com/maps/api/place"
 maps_client: httpx.AsyncClient | None = None
 
+# /nearby-with-details fans out details calls: at most PLACES_DETAILS_CONCURRENCY
+# in flight, each abandoned after PLACES_DETAILS_TIMEOUT seconds
+DETAILS_CONCURRENCY = int(os.getenv("PLACES_DETAILS_CONCURRENCY", "8"))
+DETAILS_TIMEOUT_SECONDS = float(os.getenv("PLACES_DETAILS_TIMEOUT", "5"))
+details_semaphore = asyncio.Semaphore(DETAILS_CONCURRENCY)
+
+# Places responses are cached (TTL + LRU); set PLACES_CACHE_DB to a file path to
+# keep them across restarts
+places_cache = PlacesCache(
+    max_entries=int(os.getenv("PLACES_CACHE_SIZE", "2048")),
+    ttls={
+        NEARBY_PATH: float(os.getenv("PLACES_NEARBY_TTL", str(15 * 60))),
+        DETAILS_PATH: float(os.getenv("PLACES_DETAILS_TTL", str(7 * 24 * 3600))),
+    },
+    db_path=os.getenv("PLACES_CACHE_DB"),
+)
+# Identical Places calls already in flight share one upstream request
+places_flights = SingleFlight("places")
+
+# /nearby?paginate=true returns page 1 at once; the following pages are fetched in
+# the background as soon as Google activates each next_page_token (~2 s)
+PAGE_TOKEN_DELAY_SECONDS = 2.0
+PAGE_TOKEN_RETRIES = 5
+CONTINUATION_TTL_SECONDS = 120.0
+nearby_continuations: dict[str, tuple[float, asyncio.Task]] = {}
+
 # Configure Gemini
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
@@ -46,6 +108,28 @@ if GEMINI_API_KEY:
 else:
     gemini_model = None
 
+# The Gemini SDK is synchronous: calls run on a small dedicated thread pool so a
+# slow completion never blocks the event loop (excess requests queue for a thread)
+GEMINI_WORKERS = int(os.getenv("GEMINI_WORKERS", "4"))
+gemini_executor = ThreadPoolExecutor(max_workers=GEMINI_WORKERS, thread_name_prefix="gemini")
+
+# Live chat sessions per conversation_id: follow-up turns send only the new message,
+# and histories past CHAT_TOKEN_BUDGET (estimated tokens) are summarized
+chat_sessions = ChatSessionStore(
+    max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "512")),
+    ttl=float(os.getenv("CHAT_SESSION_TTL", "1800")),
+    token_budget=int(os.getenv("CHAT_TOKEN_BUDGET", "8000")),
+)
+
+# Answers to first-turn questions, keyed on the normalized question and CTS severity;
+# near-duplicate questions match through a local hashed-embedding similarity index
+chat_cache = ChatResponseCache(
+    max_entries=int(os.getenv("CHAT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("CHAT_CACHE_TTL", str(24 * 3600))),
+    threshold=float(os.getenv("CHAT_CACHE_SIMILARITY", "0.9")),
+    semantic=os.getenv("CHAT_CACHE_SEMANTIC", "1") != "0",
+)
+
 
 # ─── Pydantic Models for Places API ───────
 class LatLng(BaseModel):
@@ -64,12 +148,19 @@ class PlaceSummary(BaseModel):
 
 class NearbyResponse(BaseModel):
     results: List[PlaceSummary]
+    continuation: Optional[str] = None
 
 
 class FishRankingRequest(BaseModel):
     fish_list: List[str]
 
 
+class FishRankingBatchRequest(BaseModel):
+    fish_lists: List[List[str]]
+    months: Optional[List[int]] = None
+    top_k: Optional[int] = None
+
+
 # Chat models
 class ChatMessage(BaseModel):
     role: str
@@ -79,24 +170,153 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     messages: List[ChatMessage]
     ctsData: Optional[dict] = None
+    conversation_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
     response: str
+    conversation_id: Optional[str] = None
 
 
 @app.on_event("startup")
 async def load_data():
-    global fish_df
+    global store
     try:
-        fish_df = pd.read_csv(FISH_DATA_PATH)
-        # Filter to only fish classes
-        fish_classes = ['Actinopteri', 'Actinopterygii', 'Elasmobranchii', 'Myxini', 'Cephalaspidomorphi']
-        fish_df = fish_df[fish_df['class'].isin(fish_classes)]
-        print(f"Loaded {len(fish_df)} fish occurrence records")
+        store = await asyncio.to_thread(_load_store)
     except Exception as e:
+        # watch_segments retries the load
         print(f"Error loading fish data: {e}")
-        fish_df = pd.DataFrame()
+        store = None
+        return
+
+    try:
+        tile_pyramids[tile_slug(None)] = await asyncio.to_thread(load_or_build, store, None, TILE_DIR)
+        print(f"Tile pyramid ready (z0-z{MAX_ZOOM})")
+    except Exception as e:
+        print(f"Error building tile pyramid: {e}")
+
+
+def _load_store() -> OccurrenceStore:
+    """Load the dataset plus its segments (or attach to the shared snapshot)"""
+    # Projected, categorical, float32 columns; only fish classes are kept
+    if SHARED_STORE_DIR:
+        # POSIX only (file locks), so imported just when shared mode is enabled
+        from occurrence.shared import load_shared
+        loaded = load_shared(SHARED_STORE_DIR, FISH_DATA_PATH, SEGMENT_DIR)
+    else:
+        loaded = OccurrenceStore.load(FISH_DATA_PATH)
+        loaded = apply_segments(loaded, SEGMENT_DIR) or loaded
+    info = loaded.describe()
+    mode = f"shared from {loaded.shared_path}" if info["shared"] else "resident"
+    print(f"Loaded {info['records']} fish occurrence records ({info['resident_mb']} MB {mode})")
+    return loaded
+
+
+def _refresh_store(current: OccurrenceStore) -> OccurrenceStore | None:
+    """Store including any new segments, or None if the dataset is unchanged"""
+    if SHARED_STORE_DIR:
+        from occurrence.shared import expected_version, load_shared
+        # Attach to (or publish) the snapshot for the new version instead of appending privately
+        if expected_version(FISH_DATA_PATH, SEGMENT_DIR) == current.version:
+            return None
+        return load_shared(SHARED_STORE_DIR, FISH_DATA_PATH, SEGMENT_DIR)
+    return apply_segments(current, SEGMENT_DIR)
+
+
+async def watch_segments():
+    """Poll for new delta segments and atomically swap in an extended store"""
+    global store
+    while True:
+        await asyncio.sleep(SEGMENT_POLL_SECONDS)
+        current = store
+        if current is None:
+            # The startup load failed (e.g. a snapshot was replaced mid-attach): try again
+            try:
+                loaded = await asyncio.to_thread(_load_store)
+            except Exception as e:
+                print(f"Error loading fish data: {e}")
+                continue
+            if store is None:
+                store = loaded
+            continue
+        try:
+            # Reading segments and rebuilding indexes happens off the event loop;
+            # requests keep using the current store until the reference is swapped
+            updated = await asyncio.to_thread(_refresh_store, current)
+        except Exception as e:
+            print(f"Error applying occurrence segments: {e}")
+            continue
+        if updated is not None and store is current:
+            store = updated
+            print(
+                f"Applied occurrence segments: {len(current)} -> {len(updated)} records "
+                f"({updated.describe()['resident_mb']} MB {'shared' if updated.shared_path else 'resident'})"
+            )
+
+
+@app.on_event("startup")
+async def start_segment_watcher():
+    global segment_watcher
+    if SEGMENT_POLL_SECONDS > 0:
+        segment_watcher = asyncio.create_task(watch_segments())
+
+
+@app.on_event("shutdown")
+async def stop_segment_watcher():
+    if segment_watcher:
+        segment_watcher.cancel()
+
+
+def _require_store() -> OccurrenceStore:
+    """Return the loaded occurrence store or fail the request"""
+    if store is None or len(store) == 0:
+        raise HTTPException(status_code=500, detail="Fish data not loaded")
+    return store
+
+
+async def _tile_pyramid(occurrences: OccurrenceStore, fish_type: Optional[str]) -> TilePyramid:
+    """Return the tile pyramid for a fish type, loading or building it off the event loop"""
+    slug = tile_slug(fish_type)
+    pyramid = tile_pyramids.get(slug)
+    if pyramid is None or pyramid.version != occurrences.version:
+        pyramid = await asyncio.to_thread(load_or_build, occurrences, fish_type, TILE_DIR)
+        tile_pyramids[slug] = pyramid
+    return pyramid
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decode a /fish-occurrences pagination cursor (the last row id of the previous page)"""
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _stream_occurrences(occurrences: OccurrenceStore, filters: dict, limit: Optional[int], after: Optional[int]):
+    """Yield matching records as NDJSON, one chunk of rows at a time"""
+    # One index lookup up front; only the int32 row ids are held, rows are materialized per chunk
+    rows = occurrences.select(**filters, limit=limit, after=after)
+    for start in range(0, len(rows), STREAM_CHUNK_ROWS):
+        yield ndjson_lines(occurrences.take(rows[start:start + STREAM_CHUNK_ROWS], RECORD_COLUMNS))
+
+
+def _parse_coords(value: Optional[str], name: str, count: int) -> Optional[tuple]:
+    """Parse a comma-separated coordinate query parameter (bbox or near)"""
+    if value is None:
+        return None
+    try:
+        coords = tuple(float(part) for part in value.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be {count} comma-separated numbers")
+    if len(coords) != count:
+        raise HTTPException(status_code=400, detail=f"{name} must be {count} comma-separated numbers")
+    lats = coords[1::2] if name == "bbox" else coords[:1]
+    lngs = coords[0::2] if name == "bbox" else coords[1:]
+    if any(abs(lat) > 90 for lat in lats) or any(abs(lng) > 180 for lng in lngs):
+        raise HTTPException(status_code=400, detail=f"{name} is outside valid latitude/longitude ranges")
+    return coords
 
 
 @app.on_event("startup")
@@ -112,22 +332,104 @@ async def shutdown_maps_client():
     if maps_client:
         await maps_client.aclose()
         print("Google Maps API client closed")
+    for _, task in nearby_continuations.values():
+        task.cancel()
+    nearby_continuations.clear()
+    places_cache.close()
 
 
 # ─── Helper Function for Google Maps API ───────
 async def _get_json(path: str, params: dict) -> dict:
-    """Make authenticated request to Google Maps API"""
+    """Make authenticated request to Google Maps API (successful responses are cached)"""
     assert maps_client
     api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="GOOGLE_MAPS_API_KEY not configured")
 
-    resp = await maps_client.get(f"{MAPS_BASE}/{path}", params={**params, "key": api_key})
-    data = resp.json()
-    status = data.get("status")
-    if status not in ("OK", "ZERO_RESULTS"):
-        raise HTTPException(status_code=502, detail=f"Google error: {status} - {data.get('error_message')}")
-    return data
+    params = places_cache.normalize(path, params)
+    cache_key = places_cache.key(path, params)
+    cached = places_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    async def fetch() -> dict:
+        resp = await maps_client.get(f"{MAPS_BASE}/{path}", params={**params, "key": api_key})
+        data = resp.json()
+        status = data.get("status")
+        if status not in ("OK", "ZERO_RESULTS"):
+            raise HTTPException(status_code=502, detail=f"Google error: {status} - {data.get('error_message')}")
+        places_cache.set(cache_key, data, places_cache.ttl(path))
+        return data
+
+    return await places_flights.do(cache_key, fetch)
+
+
+async def _fetch_phone(place_id: str) -> Optional[str]:
+    """Phone number of a place, or None if the details call fails or times out"""
+    details_params = {
+        "place_id": place_id,
+        "fields": "formatted_phone_number"
+    }
+    async with details_semaphore:
+        try:
+            details_data = await asyncio.wait_for(_get_json("details/json", details_params), DETAILS_TIMEOUT_SECONDS)
+        except Exception:
+            return None
+    return details_data.get("result", {}).get("formatted_phone_number")
+
+
+def _summarize_places(results: list[dict]) -> list[PlaceSummary]:
+    """Trim raw Places results to a simple shape"""
+    simplified = []
+    for r in results:
+        loc = r.get("geometry", {}).get("location", {})
+        simplified.append(
+            PlaceSummary(
+                name=r.get("name"),
+                rating=r.get("rating"),
+                address=r.get("vicinity") or r.get("formatted_address"),
+                place_id=r.get("place_id"),
+                location=LatLng(lat=loc.get("lat"), lng=loc.get("lng")) if loc else None,
+            )
+        )
+    return simplified
+
+
+async def _fetch_next_page(token: str) -> tuple[dict, Optional[str]]:
+    """
+    Fetch the page behind a next_page_token once it activates.
+
+    Google rejects a token with INVALID_REQUEST until it becomes valid, so the
+    call is retried briefly. The page after it is prefetched right away too;
+    returns the page and that page's continuation id.
+    """
+    await asyncio.sleep(PAGE_TOKEN_DELAY_SECONDS)
+    for attempt in range(PAGE_TOKEN_RETRIES):
+        try:
+            data = await _get_json(NEARBY_PATH, {"pagetoken": token})
+            break
+        except HTTPException as e:
+            if "INVALID_REQUEST" not in str(e.detail) or attempt == PAGE_TOKEN_RETRIES - 1:
+                raise
+            await asyncio.sleep(0.5)
+    next_token = data.get("next_page_token")
+    return data, _prefetch_page(next_token) if next_token else None
+
+
+def _prefetch_page(token: str) -> str:
+    """Start fetching the page behind a next_page_token; returns an opaque continuation id"""
+    now = time.time()
+    for cont_id, (expires, task) in list(nearby_continuations.items()):
+        if expires <= now:
+            task.cancel()
+            del nearby_continuations[cont_id]
+
+    task = asyncio.create_task(_fetch_next_page(token))
+    # A page nobody asks for must not log "exception was never retrieved"
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+    cont_id = secrets.token_urlsafe(16)
+    nearby_continuations[cont_id] = (now + CONTINUATION_TTL_SECONDS, task)
+    return cont_id
 
 
 @app.get("/")
@@ -137,24 +439,36 @@ async def root():
         "version": "2.0.0",
         "endpoints": {
             "fish_data": {
-                "GET /fish-occurrences": "Get fish occurrence data with filters",
+                "GET /fish-occurrences": "Get fish occurrence data with filters (bbox / near+radius_km supported)",
+                "GET /fish-zones": "Get species counts aggregated into grid zones",
+                "GET /fish-tiles/{z}/{x}/{y}": "Get a precomputed map tile of aggregated occurrences",
                 "GET /fish-species": "Get list of unique fish species",
                 "GET /fish-stats": "Get statistics about fish dataset",
-                "POST /fish-ranking": "Rank fish based on freshness, season, and difficulty"
+                "POST /fish-ranking": "Rank fish based on freshness, season, and difficulty",
+                "POST /fish-ranking/batch": "Top-k rankings for many fish lists across several months",
+                "GET /fish-ranking/nearby": "Rank the species observed in an area (near+radius_km or bbox)"
             },
             "google_places": {
-                "GET /nearby": "Find places near coordinates",
+                "GET /nearby": "Find places near coordinates (paginate=true returns a continuation id)",
                 "GET /place-details/{place_id}": "Get detailed place information",
                 "GET /nearby-with-details": "Find places with phone numbers (slower)"
             },
             "market_analysis": {
-                "POST /market-insight": "Generate AI-powered market insights from fish market data"
+                "POST /market-insight": "Generate AI-powered market insights from fish market data",
+                "POST /market-insight/jobs": "Queue a market insight and return a job id",
+                "GET /market-insight/jobs/{job_id}": "Poll a market insight job (?wait=seconds)",
+                "GET /market-insight/jobs/{job_id}/events": "Stream a market insight job's status as server-sent events"
             },
             "ai_chat": {
-                "POST /chat": "AI fishing assistant chatbot"
+                "POST /chat": "AI fishing assistant chatbot",
+                "POST /chat/stream": "AI fishing assistant chatbot streamed as server-sent events"
+            },
+            "monitoring": {
+                "GET /cache-stats": "Hit/miss metrics of the response caches and request coalescing"
             }
         },
-        "fish_records": len(fish_df) if fish_df is not None else 0
+        "fish_records": len(store) if store is not None else 0,
+        "fish_store_mb": store.describe()["resident_mb"] if store is not None else 0
     }
 
 @app.get("/fish-occurrences")
@@ -164,10 +478,27 @@ async def get_fish_occurrences(
     country: Optional[str] = Query(None, description="Filter by country"),
     min_depth: Optional[float] = Query(None, description="Minimum depth in meters"),
     max_depth: Optional[float] = Query(None, description="Maximum depth in meters"),
+    bbox: Optional[str] = Query(None, description="Bounding box: west,south,east,north (degrees)"),
+    near: Optional[str] = Query(None, description="Center point for a radius search: lat,lng"),
+    radius_km: float = Query(50.0, gt=0, le=20038, description="Search radius in km when near is set"),
+    format: str = Query("records", pattern="^(records|columns)$", description="records (list of objects) or columns (one array per column)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: Optional[str] = Query(None, pattern="^ndjson$", description="ndjson streams matching records line by line"),
 ):
     """
     Get fish occurrence data with optional filters.
 
+    Spatial filters (served by a grid index, combinable with the others):
+    - bbox=west,south,east,north (west > east crosses the antimeridian)
+    - near=lat,lng&radius_km=50
+
+    format=columns returns {"columns": {name: [...]}} instead of a list of
+    records; categorical columns are dictionary-encoded as {"dictionary", "codes"}.
+
+    Pagination: responses carry next_cursor (null on the last page); pass it back
+    as cursor= to continue. stream=ndjson streams one JSON record per line
+    (limit=0 streams every match).
+
     Fish types:
     - All Fish
     - Tuna (Thunnus)
@@ -177,102 +508,113 @@ async def get_fish_occurrences(
     - Japanese Eel (Anguilla japonica)
     - Lanternfish (Myctophidae)
     """
-    if fish_df is None or len(fish_df) == 0:
-        raise HTTPException(status_code=500, detail="Fish data not loaded")
+    occurrences = _require_store()
+    bbox_coords = _parse_coords(bbox, "bbox", 4)
+    near_point = _parse_coords(near, "near", 2)
+    after = _parse_cursor(cursor)
+    filters = dict(
+        fish_type=type, country=country, min_depth=min_depth, max_depth=max_depth,
+        bbox=bbox_coords, near=near_point, radius_km=radius_km,
+    )
+
+    if stream == "ndjson":
+        return StreamingResponse(
+            _stream_occurrences(occurrences, filters, limit or None, after),
+            media_type="application/x-ndjson",
+        )
 
     try:
-        # Start with all fish data
-        filtered_df = fish_df.copy()
-
-        # Apply type filter
-        if type and type != "All Fish":
-            if "Thunnus" in type and type == "Tuna (Thunnus)":
-                # All tuna species
-                filtered_df = filtered_df[
-                    (filtered_df['genus'] == 'Thunnus') |
-                    (filtered_df['family'] == 'Scombridae')
-                ]
-            elif "Katsuwonus pelamis" in type:
-                filtered_df = filtered_df[filtered_df['scientificName'] == 'Katsuwonus pelamis']
-            elif "Thunnus albacares" in type:
-                filtered_df = filtered_df[filtered_df['scientificName'] == 'Thunnus albacares']
-            elif "Thunnus alalunga" in type:
-                filtered_df = filtered_df[filtered_df['scientificName'] == 'Thunnus alalunga']
-            elif "Anguilla japonica" in type:
-                filtered_df = filtered_df[filtered_df['scientificName'] == 'Anguilla japonica']
-            elif "Myctophidae" in type:
-                filtered_df = filtered_df[filtered_df['family'] == 'Myctophidae']
-
-        # Apply country filter
-        if country:
-            filtered_df = filtered_df[filtered_df['country'] == country]
-
-        # Apply depth filters
-        if min_depth is not None:
-            filtered_df = filtered_df[filtered_df['minimumDepthInMeters'] >= min_depth]
-        if max_depth is not None:
-            filtered_df = filtered_df[filtered_df['maximumDepthInMeters'] <= max_depth]
-
-        # Remove rows without coordinates
-        filtered_df = filtered_df.dropna(subset=['decimalLatitude', 'decimalLongitude'])
-
-        # Limit results
-        filtered_df = filtered_df.head(limit)
-
-        # Convert to list of dicts and replace NaN with None
-        records = filtered_df[[
-            'id', 'catalogNumber', 'scientificName', 'family', 'order', 'genus',
-            'decimalLatitude', 'decimalLongitude', 'country', 'eventDate',
-            'year', 'minimumDepthInMeters', 'maximumDepthInMeters', 'occurrenceStatus'
-        ]].replace({pd.NA: None, float('nan'): None}).to_dict('records')
-
-        # Replace any remaining NaN values with None
-        for record in records:
-            for key, value in record.items():
-                if pd.isna(value):
-                    record[key] = None
-
-        return {
-            "count": len(records),
-            "filter": type or "All Fish",
-            "data": records
-        }
+        # Intersect the precomputed row-id indexes; only the returned rows are materialized.
+        # One extra row tells whether another page exists.
+        rows = occurrences.select(**filters, limit=None if limit is None else limit + 1, after=after)
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = str(rows[-1]) if limit > 0 else cursor
+
+        # Serialize straight from the column arrays with orjson (nulls resolved per column)
+        frame = occurrences.take(rows, RECORD_COLUMNS)
+        payload = {"count": len(frame), "filter": type or "All Fish", "next_cursor": next_cursor}
+        if format == "columns":
+            payload["format"] = "columns"
+            payload["columns"] = column_payload(frame)
+        else:
+            payload["data"] = record_rows(frame)
+        return Response(content=dumps(payload), media_type="application/json")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
-@app.get("/fish-species")
-async def get_fish_species():
-    """Get list of unique fish species in the dataset"""
-    if fish_df is None or len(fish_df) == 0:
-        raise HTTPException(status_code=500, detail="Fish data not loaded")
+@app.get("/fish-zones")
+async def get_fish_zones(
+    grid: float = Query(5.0, ge=0.5, le=45, description="Zone size in degrees of latitude/longitude"),
+    type: Optional[str] = Query(None, description="Fish type filter (same values as /fish-occurrences)"),
+    country: Optional[str] = Query(None, description="Filter by country"),
+):
+    """
+    Aggregate all matching occurrences into grid zones.
 
-    species = fish_df['scientificName'].value_counts().head(50).to_dict()
-    return {"species": species}
+    Returns the zone structure used by the map (center, bounds, speciesCount,
+    dominantSpecies, totalCount). Results are cached per (grid, type, country).
+    """
+    occurrences = _require_store()
+    zones = occurrences.zones(grid, type if type != "All Fish" else None, country)
+    return {
+        "grid": grid,
+        "filter": type or "All Fish",
+        "total_count": sum(zone["totalCount"] for zone in zones),
+        "zones": zones
+    }
 
-@app.get("/fish-stats")
-async def get_fish_stats():
-    """Get statistics about the fish dataset"""
-    if fish_df is None or len(fish_df) == 0:
-        raise HTTPException(status_code=500, detail="Fish data not loaded")
+@app.get("/fish-tiles/{z}/{x}/{y}")
+async def get_fish_tile(
+    z: int,
+    x: int,
+    y: int,
+    type: Optional[str] = Query(None, description="Fish type filter (same values as /fish-occurrences)"),
+):
+    """
+    Get one precomputed Web Mercator tile of aggregated occurrences.
 
-    stats = {
-        "total_records": len(fish_df),
-        "unique_species": fish_df['scientificName'].nunique(),
-        "countries": fish_df['country'].value_counts().to_dict(),
-        "top_families": fish_df['family'].value_counts().head(10).to_dict(),
-        "top_species": fish_df['scientificName'].value_counts().head(10).to_dict(),
-        "date_range": {
-            "min_year": int(fish_df['year'].min()) if pd.notna(fish_df['year'].min()) else None,
-            "max_year": int(fish_df['year'].max()) if pd.notna(fish_df['year'].max()) else None,
-        },
-        "depth_range": {
-            "min": float(fish_df['minimumDepthInMeters'].min()) if pd.notna(fish_df['minimumDepthInMeters'].min()) else None,
-            "max": float(fish_df['maximumDepthInMeters'].max()) if pd.notna(fish_df['maximumDepthInMeters'].max()) else None,
-        }
+    Each tile is split into 16x16 cells; every occupied cell carries its record
+    count, dominant species and per-species and per-family counts. Zoom levels 0-10 are available.
+    Example: /fish-tiles/3/7/3
+    """
+    if not 0 <= z <= MAX_ZOOM:
+        raise HTTPException(status_code=404, detail=f"Zoom must be between 0 and {MAX_ZOOM}")
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile coordinates out of range")
+
+    occurrences = _require_store()
+    pyramid = await _tile_pyramid(occurrences, type)
+    cells = pyramid.tile(z, x, y)
+    return {
+        "z": z,
+        "x": x,
+        "y": y,
+        "filter": type or "All Fish",
+        "count": sum(cell["count"] for cell in cells),
+        "cells": cells
     }
 
-    return stats
+@app.get("/fish-species")
+async def get_fish_species(
+    country: Optional[str] = Query(None, description="Filter by country"),
+    family: Optional[str] = Query(None, description="Filter by family"),
+):
+    """Get list of unique fish species in the dataset"""
+    # Served from aggregates pre-grouped at load time
+    species = _require_store().aggregates.species_counts(country, family)
+    return {"species": species}
+
+@app.get("/fish-stats")
+async def get_fish_stats(
+    country: Optional[str] = Query(None, description="Filter by country"),
+    family: Optional[str] = Query(None, description="Filter by family"),
+):
+    """Get statistics about the fish dataset (optionally for one country and/or family)"""
+    # Rolled up from per-(country, family, species) groups built at load time and cached
+    return _require_store().aggregates.stats(country, family)
 
 
 @app.post("/fish-ranking")
@@ -301,15 +643,99 @@ async def rank_fish(request: FishRankingRequest):
         raise HTTPException(status_code=500, detail=f"Error ranking fish: {str(e)}")
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """AI chatbot endpoint for fishing assistance"""
-    if not gemini_model:
-        raise HTTPException(status_code=500, detail="GEMINI_API_KEY environment variable is not set")
+@app.post("/fish-ranking/batch")
+async def rank_fish_batch(request: FishRankingBatchRequest):
+    """
+    Rank many fish lists in one call, optionally over several planning months.
+
+    Scores are computed with NumPy over the encoded classification table and
+    each list returns only its top_k fish (all when omitted). months defaults
+    to the current month; with several months a "horizon" ranking by mean
+    score is included.
+
+    Example:
+    POST /fish-ranking/batch
+    {
+        "fish_lists": [["Thunnus albacares", "Fragum scruposum"], ["Fulvia aperta"]],
+        "months": [6, 7, 8],
+        "top_k": 5
+    }
+    """
+    if not request.fish_lists:
+        raise HTTPException(status_code=400, detail="fish_lists cannot be empty")
+    if request.months is not None and (not request.months or any(m < 1 or m > 12 for m in request.months)):
+        raise HTTPException(status_code=400, detail="months must be a non-empty list of month numbers 1-12")
+    if request.top_k is not None and request.top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1")
 
     try:
-        # Build context with CTS data if available
-        system_context = """You are an AI fishing assistant helping fishermen and maritime workers.
+        results = fish_ranking_batch(request.fish_lists, request.months, request.top_k)
+        return {"results": results}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Fish classification data not found: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ranking fish: {str(e)}")
+
+
+@app.get("/fish-ranking/nearby")
+async def rank_fish_nearby(
+    near: Optional[str] = Query(None, description="Center point: lat,lng"),
+    radius_km: float = Query(50.0, gt=0, le=20038, description="Search radius in km when near is set"),
+    bbox: Optional[str] = Query(None, description="Bounding box: west,south,east,north (degrees)"),
+    type: Optional[str] = Query(None, description="Fish type filter (same values as /fish-occurrences)"),
+    country: Optional[str] = Query(None, description="Filter by country"),
+    min_depth: Optional[float] = Query(None, description="Minimum depth in meters"),
+    max_depth: Optional[float] = Query(None, description="Maximum depth in meters"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Month to rank for (defaults to the current month)"),
+    top_k: int = Query(10, ge=1, le=1000, description="Number of ranked species to return"),
+):
+    """
+    Rank the fish species observed around a location in one call.
+
+    Matching occurrences are selected with the same indexes as /fish-occurrences,
+    reduced to distinct species with their record counts (and closest distance
+    when near is set) and joined with the classification table. Ties in score
+    favour closer (or more frequently observed) species. Raw rows are never
+    materialized.
+    """
+    occurrences = _require_store()
+    bbox_coords = _parse_coords(bbox, "bbox", 4)
+    near_point = _parse_coords(near, "near", 2)
+    if bbox_coords is None and near_point is None:
+        raise HTTPException(status_code=400, detail="near or bbox is required")
+
+    try:
+        rows = occurrences.select(
+            type if type != "All Fish" else None, country, min_depth, max_depth,
+            bbox=bbox_coords, near=near_point, radius_km=radius_km,
+        )
+        names, counts, nearest = occurrences.species_in(rows, near_point)
+        ranking = fish_ranking_batch([names], [month] if month else None, top_k)[0]
+
+        position = {name: i for i, name in enumerate(names)}
+        results = []
+        for fish in next(iter(ranking["by_month"].values())):
+            i = position[fish["name"]]
+            fish["count"] = int(counts[i])
+            if nearest is not None:
+                fish["distance_km"] = round(float(nearest[i]), 3)
+            results.append(fish)
+
+        return {
+            "filter": type or "All Fish",
+            "month": int(next(iter(ranking["by_month"]))),
+            "total_records": len(rows),
+            "species_count": len(names),
+            "classified_species": ranking["ranked"],
+            "results": results
+        }
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Fish classification data not found: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ranking fish: {str(e)}")
+
+
+CHAT_SYSTEM_CONTEXT = """You are an AI fishing assistant helping fishermen and maritime workers.
 You provide advice on:
 - Fish handling techniques and best practices
 - Optimal fishing conditions based on weather and location
@@ -319,57 +745,260 @@ You provide advice on:
 
 Be concise, practical, and always prioritize safety. Use a friendly, helpful tone."""
 
-        if request.ctsData:
-            cts_severity = request.ctsData.get('severity', 'Unknown')
-            grip_strength = request.ctsData.get('gripStrength', 0)
-            pinch_strength = request.ctsData.get('pinchStrength', 0)
 
-            system_context += f"\n\nCurrent user health data:"
-            system_context += f"\n- CTS Risk Level: {cts_severity}"
-            system_context += f"\n- Grip Strength: {grip_strength:.1f} kg"
-            system_context += f"\n- Pinch Strength: {pinch_strength:.1f} kg"
-            system_context += "\n\nConsider this health information when providing advice about fishing techniques and equipment."
+def _chat_system_context(cts_data: Optional[dict]) -> str:
+    """System prompt, with the user's CTS data if available"""
+    system_context = CHAT_SYSTEM_CONTEXT
+    if cts_data:
+        cts_severity = cts_data.get('severity', 'Unknown')
+        grip_strength = cts_data.get('gripStrength', 0)
+        pinch_strength = cts_data.get('pinchStrength', 0)
+
+        system_context += f"\n\nCurrent user health data:"
+        system_context += f"\n- CTS Risk Level: {cts_severity}"
+        system_context += f"\n- Grip Strength: {grip_strength:.1f} kg"
+        system_context += f"\n- Pinch Strength: {pinch_strength:.1f} kg"
+        system_context += "\n\nConsider this health information when providing advice about fishing techniques and equipment."
+    return system_context
+
+
+def _chat_session(request: ChatRequest) -> ChatSession:
+    """
+    Session to continue for a chat request.
+
+    The stored session is reused when the request carries its conversation_id,
+    the same CTS data and exactly one new message on top of the turns the
+    session has seen. Otherwise a session is rebuilt from the full history.
+    """
+    context_key = json.dumps(request.ctsData, sort_keys=True) if request.ctsData else None
+    session = chat_sessions.get(request.conversation_id) if request.conversation_id else None
+    if (
+        session is not None
+        and session.context_key == context_key
+        and len(request.messages) == session.message_count + 1
+    ):
+        return session
+
+    if session is not None:
+        chat_sessions.rebuilds += 1
+    session = ChatSession(
+        request.conversation_id or chat_sessions.new_id(),
+        gemini_model,
+        _chat_system_context(request.ctsData),
+        context_key,
+        [{"role": msg.role, "content": msg.content} for msg in request.messages[:-1]],
+    )
+    chat_sessions.put(session)
+    return session
+
+
+def _is_first_turn(request: ChatRequest) -> bool:
+    """True when the last message is the conversation's first user question"""
+    return all(msg.role != "user" for msg in request.messages[:-1])
+
+
+def _cached_chat(request: ChatRequest) -> Optional[tuple[ChatSession, str]]:
+    """
+    Answer a first-turn question from the response cache.
+
+    On a hit the conversation's session is started with the cached exchange
+    already in its history, so follow-up turns continue normally.
+    """
+    if not _is_first_turn(request):
+        return None
+    text = chat_cache.get(request.messages[-1].content, severity_bucket(request.ctsData))
+    if text is None:
+        return None
+
+    messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+    session = ChatSession(
+        request.conversation_id or chat_sessions.new_id(),
+        gemini_model,
+        _chat_system_context(request.ctsData),
+        json.dumps(request.ctsData, sort_keys=True) if request.ctsData else None,
+        messages + [{"role": "assistant", "content": text}],
+    )
+    chat_sessions.put(session)
+    return session, text
+
+
+def _remember_answer(request: ChatRequest, text: str) -> None:
+    if text and _is_first_turn(request):
+        chat_cache.put(request.messages[-1].content, severity_bucket(request.ctsData), text)
+
+
+def _compact_if_needed(session: ChatSession) -> None:
+    """Summarize a session past the token budget in the background"""
+    if not chat_sessions.over_budget(session):
+        return
+
+    def compact():
+        try:
+            session.compact()
+        except Exception as e:
+            print(f"Chat summary error: {e}")
+
+    asyncio.get_running_loop().run_in_executor(gemini_executor, compact)
+
+
+def _validate_chat(request: ChatRequest) -> None:
+    if not gemini_model:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY environment variable is not set")
+    if not request.messages or request.messages[-1].role != "user":
+        raise HTTPException(status_code=400, detail="messages must end with a user message")
+
 
-        # Convert messages to Gemini format
-        conversation_history = []
-        for msg in request.messages:
-            conversation_history.append({
-                "role": "user" if msg.role == "user" else "model",
-                "parts": [msg.content]
-            })
+async def _iterate_in_thread(produce: Callable[[], Iterator[str]]) -> AsyncIterator[str]:
+    """
+    Drive a blocking iterator on gemini_executor and yield its items on the event loop.
 
-        # Start chat with history
-        chat = gemini_model.start_chat(history=conversation_history[:-1])
+    If the consumer stops early (e.g. the client disconnects) the worker thread
+    stops at its next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = False
+    done = object()
 
-        # Get the last user message
-        last_message = conversation_history[-1]["parts"][0]
+    def run():
+        try:
+            for item in produce():
+                if stopped:
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    loop.run_in_executor(gemini_executor, run)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped = True
+
+
+def _sse(event: Optional[str], data: dict) -> str:
+    """One server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """
+    AI chatbot endpoint for fishing assistance.
 
-        # Send message with system context prepended to first message
-        full_prompt = f"{system_context}\n\nUser: {last_message}" if len(conversation_history) == 1 else last_message
-        response = chat.send_message(full_prompt)
+    Pass back the returned conversation_id so follow-up turns reuse the
+    server-side session and only the newest message is sent to Gemini.
+    """
+    _validate_chat(request)
 
-        return ChatResponse(response=response.text)
+    try:
+        cached = _cached_chat(request)
+        if cached is not None:
+            session, text = cached
+            return ChatResponse(response=text, conversation_id=session.id)
+
+        session = _chat_session(request)
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(gemini_executor, session.send, request.messages[-1].content)
+        _remember_answer(request, text)
+        _compact_if_needed(session)
+        return ChatResponse(response=text, conversation_id=session.id)
 
     except Exception as e:
         print(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat as server-sent events.
+
+    Each partial completion is sent as `data: {"text": "..."}` as soon as Gemini
+    produces it, followed by `event: done` with the full response and
+    conversation_id (or `event: error` with a detail message).
+    """
+    _validate_chat(request)
+    cached = _cached_chat(request)
+    session = cached[0] if cached is not None else _chat_session(request)
+    message = request.messages[-1].content
+
+    async def events():
+        if cached is not None:
+            yield _sse(None, {"text": cached[1]})
+            yield _sse("done", {"response": cached[1], "conversation_id": session.id})
+            return
+
+        parts = []
+        try:
+            async for text in _iterate_in_thread(lambda: session.stream(message)):
+                parts.append(text)
+                yield _sse(None, {"text": text})
+            _remember_answer(request, "".join(parts))
+            _compact_if_needed(session)
+            yield _sse("done", {"response": "".join(parts), "conversation_id": session.id})
+        except Exception as e:
+            print(f"Chat error: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ─── Google Places API Endpoints ───────
 
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit/miss counters of the response caches and request coalescing"""
+    return {
+        "places": {**places_cache.stats(), "single_flight": places_flights.stats()},
+        "market_insight": insight_jobs.stats(),
+        "chat_sessions": chat_sessions.stats(),
+        "chat_responses": chat_cache.stats(),
+    }
+
+
 @app.get("/nearby", response_model=NearbyResponse)
 async def nearby(
-    lat: float = Query(..., ge=-90, le=90),
-    lng: float = Query(..., ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
     radius: int = Query(1500, ge=1, le=50000),
     type: Optional[str] = Query(None, description="e.g., cafe, restaurant, pharmacy"),
     keyword: Optional[str] = Query(None, description="e.g., ramen, matcha"),
     pages: int = Query(1, ge=1, le=3),
+    paginate: bool = Query(False, description="Return page 1 immediately with a continuation id for the next page"),
+    continuation: Optional[str] = Query(None, description="continuation from a previous paginated response"),
 ):
     """
     Find places near the given coordinates.
     Example: /nearby?lat=32.88&lng=-117.23&type=cafe&radius=2000
+
+    With paginate=true only page 1 is returned, together with a continuation id
+    when more results exist. The next pages are prefetched in the background, so
+    /nearby?continuation=<id> returns the next page without the token delay.
     """
+    if continuation is not None:
+        entry = nearby_continuations.get(continuation)
+        if entry is None or entry[0] <= time.time():
+            raise HTTPException(status_code=404, detail="Unknown or expired continuation")
+        data, next_continuation = await asyncio.shield(entry[1])
+        return NearbyResponse(results=_summarize_places(data.get("results", [])), continuation=next_continuation)
+
+    if lat is None or lng is None:
+        raise HTTPException(status_code=400, detail="lat and lng are required")
+
     params = {"location": f"{lat},{lng}", "radius": radius}
     if type: params["type"] = type
     if keyword: params["keyword"] = keyword
@@ -378,6 +1007,10 @@ async def nearby(
     data = await _get_json("nearbysearch/json", params)
     results.extend(data.get("results", []))
 
+    if paginate:
+        token = data.get("next_page_token")
+        return NearbyResponse(results=_summarize_places(results), continuation=_prefetch_page(token) if token else None)
+
     # Handle pagination if requested
     token = data.get("next_page_token")
     page_count = 1
@@ -388,20 +1021,7 @@ async def nearby(
         token = data.get("next_page_token")
         page_count += 1
 
-    # Trim to a simple shape
-    simplified = []
-    for r in results:
-        loc = r.get("geometry", {}).get("location", {})
-        simplified.append(
-            PlaceSummary(
-                name=r.get("name"),
-                rating=r.get("rating"),
-                address=r.get("vicinity") or r.get("formatted_address"),
-                place_id=r.get("place_id"),
-                location=LatLng(lat=loc.get("lat"), lng=loc.get("lng")) if loc else None,
-            )
-        )
-    return NearbyResponse(results=simplified)
+    return NearbyResponse(results=_summarize_places(results))
 
 
 @app.get("/place-details/{place_id}")
@@ -453,25 +1073,14 @@ async def nearby_with_details(
     data = await _get_json("nearbysearch/json", params)
     places = data.get("results", [])[:limit]  # Limit results
 
-    # Fetch details for each place (includes phone)
-    detailed_results = []
-    for place in places:
-        place_id = place.get("place_id")
-        if not place_id:
-            continue
-
-        # Get detailed info
-        details_params = {
-            "place_id": place_id,
-            "fields": "formatted_phone_number"
-        }
-
-        try:
-            details_data = await _get_json("details/json", details_params)
-            phone = details_data.get("result", {}).get("formatted_phone_number")
-        except:
-            phone = None
+    # Fetch details for all places concurrently (includes phone); a failed or
+    # timed-out lookup only leaves that place without a phone number
+    places = [place for place in places if place.get("place_id")]
+    phones = await asyncio.gather(*(_fetch_phone(place["place_id"]) for place in places))
 
+    detailed_results = []
+    for place, phone in zip(places, phones):
+        place_id = place["place_id"]
         loc = place.get("geometry", {}).get("location", {})
         detailed_results.append(
             PlaceSummary(
@@ -504,14 +1113,63 @@ class MarketInsightRequest(BaseModel):
     markets: List[dict]
 
 
+# Browser Use runs take tens of seconds: they run on a worker pool as jobs, and
+# finished insights are cached by a content hash of the market list
+insight_jobs = InsightJobQueue(
+    market_insight,
+    workers=int(os.getenv("MARKET_INSIGHT_WORKERS", "2")),
+    cache_ttl=float(os.getenv("MARKET_INSIGHT_CACHE_TTL", str(6 * 3600))),
+)
+INSIGHT_POLL_SECONDS = 1.0
+
+
+@app.on_event("shutdown")
+async def stop_insight_jobs():
+    insight_jobs.shutdown()
+
+
+async def _wait_for_job(job: InsightJob, timeout: Optional[float]) -> None:
+    """Wait up to timeout seconds for a job to finish (None waits indefinitely)"""
+    try:
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout)
+    except asyncio.TimeoutError:
+        pass
+    except Exception:
+        # Failures are reported through the job status
+        pass
+
+
+def _require_job(job_id: str) -> InsightJob:
+    job = insight_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+# Narrative fields the LLM task fills in on top of the locally computed insight
+NARRATIVE_FIELDS = ("summary", "key_findings", "recommendations")
+
+
 @app.post("/market-insight")
-async def get_market_insight(request: MarketInsightRequest):
+async def get_market_insight(
+    request: MarketInsightRequest,
+    mode: str = Query("full", pattern="^(full|fast)$", description="full waits for the LLM; fast answers from local analytics"),
+):
     """
     Generate market insights from fish market data.
 
     Input: List of markets (typically from /nearby-with-details)
     Output: Comprehensive market analysis with summary, findings, and recommendations
 
+    Runs as a job on the insight worker pool and waits for it, so the event
+    loop stays free; repeat requests for the same markets are served from cache.
+    Use POST /market-insight/jobs to get a job id back immediately instead.
+
+    mode=fast computes the insight locally (counts, ratings, phone coverage,
+    proximity clusters) and returns at once. The LLM narrative is queued in the
+    background and merged in when already available; otherwise the response
+    carries "enrichment_job_id" to poll for it.
+
     Example:
     POST /market-insight
     {
@@ -529,11 +1187,77 @@ async def get_market_insight(request: MarketInsightRequest):
     if not request.markets:
         raise HTTPException(status_code=400, detail="markets list cannot be empty")
 
-    try:
-        insights = market_insight(request.markets)
+    if mode == "fast":
+        insights = local_market_insight(request.markets)
+        job = insight_jobs.submit(request.markets)
+        insights["enriched"] = job.status == DONE
+        insights["enrichment_job_id"] = None if job.status == DONE else job.id
+        if job.status == DONE:
+            insights.update({field: job.result[field] for field in NARRATIVE_FIELDS if job.result.get(field)})
         return insights
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating market insights: {str(e)}")
+
+    job = insight_jobs.submit(request.markets)
+    await _wait_for_job(job, None)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"Error generating market insights: {job.error}")
+    return job.result
+
+
+@app.post("/market-insight/jobs", status_code=202)
+async def create_market_insight_job(request: MarketInsightRequest):
+    """
+    Queue a market insight and return its job id immediately.
+
+    Poll GET /market-insight/jobs/{job_id} (optionally with ?wait=seconds) or
+    stream GET /market-insight/jobs/{job_id}/events. A cached insight comes
+    back with status "done" right away.
+    """
+    if not request.markets:
+        raise HTTPException(status_code=400, detail="markets list cannot be empty")
+    return insight_jobs.submit(request.markets).to_dict()
+
+
+@app.get("/market-insight/jobs/{job_id}")
+async def get_market_insight_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for the job to finish before responding"),
+):
+    """Status of a market insight job, with the insight once it is done"""
+    job = _require_job(job_id)
+    if wait and job.status not in (DONE, FAILED):
+        await _wait_for_job(job, wait)
+    return job.to_dict()
+
+
+@app.get("/market-insight/jobs/{job_id}/events")
+async def stream_market_insight_job(job_id: str):
+    """
+    Server-sent status events for a market insight job.
+
+    Emits `event: status` whenever the status changes and ends with
+    `event: done` (carrying the insight) or `event: error`.
+    """
+    job = _require_job(job_id)
+
+    async def events():
+        last_status = None
+        while True:
+            if job.status != last_status:
+                last_status = job.status
+                yield _sse("status", {"job_id": job.id, "status": job.status})
+            if job.status == DONE:
+                yield _sse("done", job.to_dict())
+                return
+            if job.status == FAILED:
+                yield _sse("error", job.to_dict())
+                return
+            await _wait_for_job(job, INSIGHT_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 if __name__ == "__main__":
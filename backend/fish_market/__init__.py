@@ -1,5 +1,5 @@
 """Fish market utilities package."""
-from .fish_ranking import fish_ranking
+from .fish_ranking import fish_ranking, fish_ranking_batch
 
-__all__ = ['fish_ranking']
+__all__ = ['fish_ranking', 'fish_ranking_batch']
 
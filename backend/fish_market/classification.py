@@ -0,0 +1,153 @@
+"""
+In-memory fish classification table used by fish_ranking.
+
+fish_classification.csv is parsed once into numeric-encoded NumPy columns
+indexed by scientific name, and re-read only when the file's mtime changes,
+so a ranking call costs O(len(fish_list)) instead of O(table size). Each
+peak_season label is also parsed once into a 12-entry vector holding its
+peak_season_score for every month of the year.
+"""
+import csv
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "fish_classification.csv")
+
+# Numeric encodings used by the ranking formula (unknown labels fall back to the defaults)
+CLEANING_SCORES = {"easy": 1, "medium": 2, "hard": 3}
+DEFAULT_CLEANING_SCORE = 2
+COMMONALITY_SCORES = {"rare": 1, "uncommon": 2, "common": 3}
+DEFAULT_COMMONALITY_SCORE = 3
+
+# map from month name to month number
+MONTH_MAP = {
+    "January": 1,
+    "February": 2,
+    "March": 3,
+    "April": 4,
+    "May": 5,
+    "June": 6,
+    "July": 7,
+    "August": 8,
+    "September": 9,
+    "October": 10,
+    "November": 11,
+    "December": 12
+}
+MAX_SEASON_SCORE = 6
+
+
+def peak_season_months(peak_season: str) -> List[int]:
+    """Months covered by a peak_season label such as "June-August" (empty if none are named)."""
+    # Month names are matched in calendar order; the first and last found bound the range
+    month_names_in_season = [month_name for month_name in MONTH_MAP if month_name in peak_season]
+
+    if len(month_names_in_season) >= 2:
+        start_month = MONTH_MAP[month_names_in_season[0]]
+        end_month = MONTH_MAP[month_names_in_season[-1]]
+        if start_month <= end_month:
+            return list(range(start_month, end_month + 1))
+        # Wraps around the year (e.g., November-February)
+        return list(range(start_month, 13)) + list(range(1, end_month + 1))
+    if len(month_names_in_season) == 1:
+        return [MONTH_MAP[month_names_in_season[0]]]
+    return []
+
+
+@lru_cache(maxsize=None)
+def season_scores(peak_season: str) -> np.ndarray:
+    """
+    peak_season_score for each month (index 0 is January).
+
+    1 inside the season, otherwise one more than the circular distance in months
+    to the nearest season month, capped at 6 (also used when no season is known).
+    """
+    scores = np.full(12, MAX_SEASON_SCORE, dtype=np.int8)
+    months = peak_season_months(peak_season)
+    if peak_season == "Year-Round":
+        scores[:] = 1
+    elif months:
+        current = np.arange(1, 13)[:, None]
+        distance = np.abs(current - np.array(months)[None, :])
+        distance = np.minimum(distance, 12 - distance).min(axis=1)
+        scores[:] = np.minimum(distance + 1, MAX_SEASON_SCORE)
+    scores.setflags(write=False)
+    return scores
+
+
+class FishClassification:
+    """Columns of fish_classification.csv, one row per scientific name."""
+
+    def __init__(self, path: str = CSV_PATH):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns
+
+        rows: Dict[str, dict] = {}
+        with open(path, 'r', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                # Later rows override earlier duplicates
+                rows[row['scientificName']] = row
+
+        self.names: List[str] = list(rows)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        records = list(rows.values())
+
+        # Original labels, returned as-is in ranking results
+        self.cleaning_difficulty: List[str] = [r['cleaning_difficulty'] for r in records]
+        self.commonality: List[str] = [r['commonality'] for r in records]
+        self.peak_season: List[str] = [r['peak_season'] for r in records]
+
+        # Numeric encodings
+        self.cleaning_score = np.array(
+            [CLEANING_SCORES.get(label.lower(), DEFAULT_CLEANING_SCORE) for label in self.cleaning_difficulty],
+            dtype=np.int8,
+        )
+        self.commonality_score = np.array(
+            [COMMONALITY_SCORES.get(label.lower(), DEFAULT_COMMONALITY_SCORE) for label in self.commonality],
+            dtype=np.int8,
+        )
+        self.is_edible = np.array([r['is_edible'].lower() == 'true' for r in records], dtype=bool)
+
+        # (rows, 12) peak_season_score per month; few distinct labels, so each is parsed once
+        self.season_score = (
+            np.stack([season_scores(label) for label in self.peak_season])
+            if records else np.empty((0, 12), dtype=np.int8)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Row index of a scientific name, or None if it is not classified."""
+        return self.index.get(name)
+
+    def scores(self, rows: np.ndarray, months: np.ndarray) -> np.ndarray:
+        """
+        Ranking scores of the given rows for each month (1-12), shape (len(rows), len(months)).
+
+        Same formula as fish_ranking: (is_edible * commonality) / (peak_season_score + cleaning_difficulty).
+        """
+        numerator = (self.is_edible[rows] * self.commonality_score[rows]).astype(np.float64)
+        denominator = self.season_score[rows][:, months - 1] + self.cleaning_score[rows][:, None]
+        return numerator[:, None] / denominator
+
+
+_table: Optional[FishClassification] = None
+_lock = threading.Lock()
+
+
+def get_classification(path: str = CSV_PATH) -> FishClassification:
+    """Return the shared classification table, reloading it if the CSV changed on disk."""
+    global _table
+    mtime = os.stat(path).st_mtime_ns
+    table = _table
+    if table is not None and table.path == path and table.mtime == mtime:
+        return table
+    with _lock:
+        if _table is None or _table.path != path or _table.mtime != mtime:
+            _table = FishClassification(path)
+        return _table
@@ -1,6 +1,13 @@
 import time
-import csv
-import os
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    from .classification import get_classification
+except ImportError:
+    from classification import get_classification
+
 
 def fish_ranking(fish_list: list) -> dict:
     """
@@ -29,22 +36,6 @@ def fish_ranking(fish_list: list) -> dict:
     # give me the month
     current_month = int(time.strftime("%m"))
 
-    # create a map from month day to month number
-    month_map = {
-        "January": 1,
-        "February": 2,
-        "March": 3,
-        "April": 4,
-        "May": 5,
-        "June": 6,
-        "July": 7,
-        "August": 8,
-        "September": 9,
-        "October": 10,
-        "November": 11,
-        "December": 12
-    }
-
     """
     for each fish in fish_list, we want to calculate a score based on cleaning_difficulty, commonality, peak_season, and edibility.
     we will say (is_edible*(cleaning_difficulty + commonality))/peak_season
@@ -56,85 +47,25 @@ def fish_ranking(fish_list: list) -> dict:
         else the further away the current_month is from peak_season, the higher the number (max 6)
     """
 
-    # Load fish data from CSV
-    csv_path = os.path.join(os.path.dirname(__file__), "..", "data", "fish_classification.csv")
-    fish_data_map = {}
-
-    with open(csv_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            scientific_name = row['scientificName']
-            fish_data_map[scientific_name] = {
-                'cleaning_difficulty': row['cleaning_difficulty'],
-                'commonality': row['commonality'],
-                'peak_season': row['peak_season'],
-                'is_edible': row['is_edible'].lower() == 'true'
-            }
+    # Classification table is parsed once and reloaded only when the CSV changes
+    table = get_classification()
 
     # Calculate scores for each fish
     fish_scores = []
 
     for fish_name in fish_list:
-        # Get fish data from CSV, skip if not found
-        if fish_name not in fish_data_map:
+        # Get fish data from the classification table, skip if not found
+        row = table.lookup(fish_name)
+        if row is None:
             continue
 
-        fish_data = fish_data_map[fish_name]
-
-        # Extract fish data
-        is_edible = 1 if fish_data['is_edible'] else 0
-
-        # Map cleaning difficulty to numeric value
-        cleaning_map = {"easy": 1, "medium": 2, "hard": 3}
-        cleaning_difficulty = cleaning_map.get(fish_data['cleaning_difficulty'].lower(), 2)
+        # Numeric encodings are precomputed by the table
+        is_edible = int(table.is_edible[row])
+        cleaning_difficulty = int(table.cleaning_score[row])
+        commonality = int(table.commonality_score[row])
 
-        # Map commonality to numeric value
-        commonality_map = {"rare": 1, "uncommon": 2, "common": 3}
-        commonality = commonality_map.get(fish_data['commonality'].lower(), 3)
-
-        # Calculate peak season distance
-        peak_season_str = fish_data['peak_season']
-
-        # Check if it's year-round
-        if peak_season_str == "Year-Round":
-            peak_season_score = 1  # Always in season
-        else:
-            # Parse the range: "June-August" or single months
-            peak_season_months = []
-
-            # Extract month names from the string
-            month_names_in_season = []
-            for month_name in month_map.keys():
-                if month_name in peak_season_str:
-                    month_names_in_season.append(month_name)
-
-            if len(month_names_in_season) >= 2:
-                # It's a range: start_month to end_month
-                start_month = month_map[month_names_in_season[0]]
-                end_month = month_map[month_names_in_season[-1]]
-
-                # Generate all months in the range (handle wrap-around)
-                if start_month <= end_month:
-                    peak_season_months = list(range(start_month, end_month + 1))
-                else:
-                    # Wraps around the year (e.g., November-February)
-                    peak_season_months = list(range(start_month, 13)) + list(range(1, end_month + 1))
-            elif len(month_names_in_season) == 1:
-                # Single month
-                peak_season_months = [month_map[month_names_in_season[0]]]
-
-            # Calculate distance from current month to peak season
-            if current_month in peak_season_months:
-                peak_season_score = 1
-            elif peak_season_months:
-                # Find minimum distance to the peak season range (circular distance)
-                min_distance = min(
-                    min(abs(current_month - pm), 12 - abs(current_month - pm))
-                    for pm in peak_season_months
-                )
-                peak_season_score = min(min_distance + 1, 6)  # max 6
-            else:
-                peak_season_score = 6  # worst score if no peak season info
+        # Peak season score for this month is precomputed per species
+        peak_season_score = int(table.season_score[row, current_month - 1])
 
         # Calculate final score (higher is better, so we invert the formula)
         # Original: (is_edible*(cleaning_difficulty + commonality))/peak_season
@@ -147,10 +78,10 @@ def fish_ranking(fish_list: list) -> dict:
         fish_scores.append({
             "name": fish_name,
             "score": score,
-            "cleaning_difficulty": fish_data['cleaning_difficulty'],
-            "commonality": fish_data['commonality'],
-            "peak_season": fish_data['peak_season'],
-            "is_edible": fish_data['is_edible']
+            "cleaning_difficulty": table.cleaning_difficulty[row],
+            "commonality": table.commonality[row],
+            "peak_season": table.peak_season[row],
+            "is_edible": bool(table.is_edible[row])
         })
 
     # Sort by score (higher score = better rank)
@@ -172,6 +103,99 @@ def fish_ranking(fish_list: list) -> dict:
     return result
 
 
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k best scores, best first.
+
+    argpartition finds the k-th best score without a full sort; ties keep list
+    order, so the result is the head of fish_ranking's stable descending sort.
+    """
+    if k < len(scores):
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)[:k - len(above)]
+        positions = np.concatenate([above, tied])
+    else:
+        positions = np.arange(len(scores))
+    return positions[np.lexsort((positions, -scores[positions]))]
+
+
+def fish_ranking_batch(fish_lists: List[List[str]], months: Optional[List[int]] = None, top_k: Optional[int] = None) -> List[dict]:
+    """
+    Rank many fish lists at once, for one or more months.
+
+    Scores for every (fish, month) pair are computed in one NumPy pass over the
+    encoded classification table. Each list returns its top_k fish per month
+    (all of them when top_k is None), ranked exactly as fish_ranking would for
+    that month; with several months, "horizon" ranks by the mean score across them.
+    Unclassified names are reported under "unknown"; repeated names count once.
+
+    Returns one dict per list:
+    {
+        "ranked": 2,
+        "unknown": ["Not a fish"],
+        "by_month": {"6": [{"name": ..., "rank": 1, "score": ..., ...}, ...]},
+        "horizon": [...]   # only when several months are given
+    }
+    """
+    if months is None:
+        months = [int(time.strftime("%m"))]
+    month_array = np.asarray(months, dtype=np.int64)
+    table = get_classification()
+
+    # Encode every list into table rows (first occurrence of a name wins)
+    list_rows = []
+    unknown = []
+    for fish_list in fish_lists:
+        rows = []
+        missing = []
+        for fish_name in dict.fromkeys(fish_list):
+            row = table.lookup(fish_name)
+            if row is None:
+                missing.append(fish_name)
+            else:
+                rows.append(row)
+        list_rows.append(np.asarray(rows, dtype=np.int64))
+        unknown.append(missing)
+
+    # One scoring pass for all lists and months
+    bounds = np.cumsum([0] + [len(rows) for rows in list_rows])
+    all_scores = table.scores(np.concatenate(list_rows) if list_rows else np.empty(0, dtype=np.int64), month_array)
+
+    def ranked(rows: np.ndarray, scores: np.ndarray) -> List[dict]:
+        positions = _top_k(scores, top_k if top_k is not None else len(scores))
+        return [
+            {
+                "name": table.names[row],
+                "rank": rank,
+                "cleaning_difficulty": table.cleaning_difficulty[row],
+                "commonality": table.commonality[row],
+                "peak_season": table.peak_season[row],
+                "is_edible": edible,
+                "score": score
+            }
+            for rank, (row, edible, score) in enumerate(
+                zip(rows[positions].tolist(), table.is_edible[rows[positions]].tolist(), scores[positions].tolist()),
+                start=1,
+            )
+        ]
+
+    results = []
+    for i, rows in enumerate(list_rows):
+        scores = all_scores[bounds[i]:bounds[i + 1]]
+        result = {
+            "ranked": len(rows),
+            "unknown": unknown[i],
+            "by_month": {str(month): ranked(rows, scores[:, j]) for j, month in enumerate(months)}
+        }
+        if len(months) > 1:
+            result["horizon"] = ranked(rows, scores.mean(axis=1))
+        results.append(result)
+
+    return results
+
+
 if __name__ == "__main__":
     # Test the function with the specified fish
     test_fish = ["Thunnus albacares", "Fragum scruposum", "Fulvia aperta", "Plagiotremus tapeinosoma"]
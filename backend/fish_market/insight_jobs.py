@@ -0,0 +1,194 @@
+"""
+Background job queue for market insight generation.
+
+A Browser Use run takes tens of seconds, so insights are produced by a small
+worker pool instead of inside the request. Submitting returns a job at once;
+callers poll (or stream) its status. Completed insights are cached by a
+content hash of the normalized market list, so repeat requests for the same
+area finish immediately, and identical requests already running share a job.
+"""
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def normalize_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fields the insight depends on, in a stable order (coordinates rounded to ~1 m)."""
+    normalized = []
+    for market in markets:
+        location = market.get("location") or {}
+        normalized.append({
+            "name": (market.get("name") or "").strip(),
+            "rating": market.get("rating"),
+            "address": (market.get("address") or "").strip(),
+            "phone": market.get("phone"),
+            "place_id": market.get("place_id"),
+            "lat": round(location["lat"], 5) if location.get("lat") is not None else None,
+            "lng": round(location["lng"], 5) if location.get("lng") is not None else None,
+        })
+    return sorted(normalized, key=lambda m: json.dumps(m, sort_keys=True, default=str))
+
+
+def markets_hash(markets: List[Dict[str, Any]]) -> str:
+    """Content hash of a market list (order-insensitive)."""
+    payload = json.dumps(normalize_markets(markets), sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class InsightJob:
+    """One market insight request and its outcome."""
+
+    def __init__(self, key: str, cached_result: Optional[dict] = None):
+        self.id = secrets.token_urlsafe(12)
+        self.key = key
+        self.future: Future = Future()
+        self.cached = cached_result is not None
+        self.status = QUEUED
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        if cached_result is not None:
+            self.future.set_result(cached_result)
+            self.status = DONE
+            self.finished = self.created
+
+    @property
+    def result(self) -> Optional[dict]:
+        return self.future.result() if self.status == DONE else None
+
+    @property
+    def error(self) -> Optional[str]:
+        if self.status != FAILED:
+            return None
+        return "cancelled" if self.future.cancelled() else str(self.future.exception())
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "cached": self.cached,
+            "created": self.created,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class InsightJobQueue:
+    """Runs insight generation on a worker pool with a content-hash result cache."""
+
+    def __init__(
+        self,
+        generate: Callable[[List[Dict[str, Any]]], dict],
+        workers: int = 2,
+        cache_size: int = 256,
+        cache_ttl: float = 6 * 3600,
+        job_ttl: float = 3600,
+        max_jobs: int = 1024,
+    ):
+        self.generate = generate
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-insight")
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self._cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        # Oldest first; finished jobs beyond max_jobs are forgotten
+        self._jobs: "OrderedDict[str, InsightJob]" = OrderedDict()
+        self._running: Dict[str, InsightJob] = {}
+        # Reentrant: a job that completes immediately finishes inside submit()
+        self._lock = threading.RLock()
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.runs = 0
+
+    def submit(self, markets: List[Dict[str, Any]]) -> InsightJob:
+        """Queue an insight for a market list, reusing a cached result or a running job."""
+        key = markets_hash(markets)
+        with self._lock:
+            self._purge()
+            cached = self._cached(key)
+            if cached is not None:
+                self.cache_hits += 1
+                job = InsightJob(key, cached)
+            elif key in self._running:
+                self.coalesced += 1
+                return self._running[key]
+            else:
+                self.runs += 1
+                job = InsightJob(key)
+                self._running[key] = job
+                job.future = self.executor.submit(self._run, job, markets)
+                job.future.add_done_callback(lambda _, job=job: self._finish(job))
+            self._jobs[job.id] = job
+            self._evict()
+            return job
+
+    def get(self, job_id: str) -> Optional[InsightJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: InsightJob, markets: List[Dict[str, Any]]) -> dict:
+        job.status = RUNNING
+        return self.generate(markets)
+
+    def _finish(self, job: InsightJob) -> None:
+        with self._lock:
+            job.finished = time.time()
+            if not job.future.cancelled() and job.future.exception() is None:
+                job.status = DONE
+                self._cache[job.key] = (job.finished + self.cache_ttl, job.future.result())
+                self._cache.move_to_end(job.key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                job.status = FAILED
+            self._running.pop(job.key, None)
+
+    def _cached(self, key: str) -> Optional[dict]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _purge(self) -> None:
+        """Forget finished jobs older than job_ttl."""
+        cutoff = time.time() - self.job_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished is not None and job.finished < cutoff:
+                del self._jobs[job_id]
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs while more than max_jobs are kept."""
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished is not None][:excess]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "cache_hits": self.cache_hits,
+                "coalesced": self.coalesced,
+                "running": len(self._running),
+                "cached_insights": len(self._cache),
+                "jobs": len(self._jobs),
+            }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
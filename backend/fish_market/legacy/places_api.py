@@ -23,6 +23,11 @@ app.add_middleware(
 
 client: httpx.AsyncClient | None = None
 
+# Bounded fan-out for detail lookups in /nearby-with-details
+DETAILS_CONCURRENCY = 8
+DETAILS_TIMEOUT_SECONDS = 5.0
+details_semaphore = asyncio.Semaphore(DETAILS_CONCURRENCY)
+
 @app.on_event("startup")
 async def startup():
     global client
@@ -63,6 +68,20 @@ async def _get_json(path: str, params: dict) -> dict:
     return data
 
 
+async def _fetch_phone(place_id: str) -> Optional[str]:
+    """Phone number of a place, or None if the details call fails or times out"""
+    details_params = {
+        "place_id": place_id,
+        "fields": "formatted_phone_number"
+    }
+    async with details_semaphore:
+        try:
+            details_data = await asyncio.wait_for(_get_json("details/json", details_params), DETAILS_TIMEOUT_SECONDS)
+        except Exception:
+            return None
+    return details_data.get("result", {}).get("formatted_phone_number")
+
+
 # ─── Endpoint: Nearby by coordinates ───────
 @app.get("/nearby", response_model=NearbyResponse)
 async def nearby(
@@ -162,25 +181,14 @@ async def nearby_with_details(
     data = await _get_json("nearbysearch/json", params)
     places = data.get("results", [])[:limit]  # Limit results
 
-    # Fetch details for each place (includes phone)
-    detailed_results = []
-    for place in places:
-        place_id = place.get("place_id")
-        if not place_id:
-            continue
-
-        # Get detailed info
-        details_params = {
-            "place_id": place_id,
-            "fields": "formatted_phone_number"
-        }
-
-        try:
-            details_data = await _get_json("details/json", details_params)
-            phone = details_data.get("result", {}).get("formatted_phone_number")
-        except:
-            phone = None
+    # Fetch details for all places concurrently (includes phone); a failed or
+    # timed-out lookup only leaves that place without a phone number
+    places = [place for place in places if place.get("place_id")]
+    phones = await asyncio.gather(*(_fetch_phone(place["place_id"]) for place in places))
 
+    detailed_results = []
+    for place, phone in zip(places, phones):
+        place_id = place["place_id"]
         loc = place.get("geometry", {}).get("location", {})
         detailed_results.append(
             PlaceSummary(
@@ -0,0 +1,199 @@
+"""
+Deterministic market analytics computed straight from the /nearby-with-details payload.
+
+Produces every MarketInsight field plus rating distribution, phone
+availability and proximity clusters without any LLM call, so
+/market-insight?mode=fast can answer immediately. The Browser Use task is
+then only needed for narrative enrichment.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Markets closer than this to one another form one cluster
+CLUSTER_RADIUS_KM = 5.0
+
+# (label, lower bound) from best to worst; unrated markets are counted separately
+RATING_BUCKETS = [("4.5+", 4.5), ("4.0-4.5", 4.0), ("3.5-4.0", 3.5), ("<3.5", -math.inf)]
+
+
+def _rating(market: Dict[str, Any]) -> Optional[float]:
+    rating = market.get("rating")
+    return float(rating) if isinstance(rating, (int, float)) else None
+
+
+def _coords(market: Dict[str, Any]) -> Optional[tuple]:
+    location = market.get("location") or {}
+    lat, lng = location.get("lat"), location.get("lng")
+    if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+        return float(lat), float(lng)
+    return None
+
+
+def rating_distribution(ratings: List[Optional[float]]) -> Dict[str, int]:
+    distribution = {label: 0 for label, _ in RATING_BUCKETS}
+    distribution["unrated"] = 0
+    for rating in ratings:
+        if rating is None:
+            distribution["unrated"] += 1
+            continue
+        for label, lower in RATING_BUCKETS:
+            if rating >= lower:
+                distribution[label] += 1
+                break
+    return distribution
+
+
+def pairwise_km(coords: np.ndarray) -> np.ndarray:
+    """Great-circle distance matrix in km for an (n, 2) array of lat/lng."""
+    lat = np.radians(coords[:, 0])[:, None]
+    lng = np.radians(coords[:, 1])[:, None]
+    a = (
+        np.sin((lat - lat.T) / 2) ** 2
+        + np.cos(lat) * np.cos(lat.T) * np.sin((lng - lng.T) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def proximity_clusters(names: List[str], coords: np.ndarray, radius_km: float = CLUSTER_RADIUS_KM) -> List[dict]:
+    """
+    Connected groups of markets within radius_km of a neighbour, largest first.
+
+    Each cluster reports its member names, centroid and span (largest distance
+    between two members).
+    """
+    n = len(names)
+    if n == 0:
+        return []
+    distances = pairwise_km(coords)
+    labels = np.full(n, -1)
+    cluster = 0
+    for start in range(n):
+        if labels[start] >= 0:
+            continue
+        labels[start] = cluster
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            for j in np.flatnonzero((distances[i] <= radius_km) & (labels < 0)):
+                labels[j] = cluster
+                stack.append(j)
+        cluster += 1
+
+    clusters = []
+    for label in range(cluster):
+        members = np.flatnonzero(labels == label)
+        center = coords[members].mean(axis=0)
+        clusters.append({
+            "markets": [names[i] for i in members],
+            "count": int(len(members)),
+            "center": {"lat": round(float(center[0]), 6), "lng": round(float(center[1]), 6)},
+            "span_km": round(float(distances[np.ix_(members, members)].max()), 2),
+        })
+    clusters.sort(key=lambda c: -c["count"])
+    return clusters
+
+
+def local_market_insight(markets_data: List[Dict[str, Any]], cluster_radius_km: float = CLUSTER_RADIUS_KM) -> dict:
+    """
+    MarketInsight fields plus an "analytics" block, computed locally.
+
+    The summary, findings and recommendations are templated from the numbers;
+    the LLM task can replace them with a richer narrative.
+    """
+    if not markets_data:
+        return {
+            "summary": "No fish markets found in the area.",
+            "total_markets": 0,
+            "average_rating": 0.0,
+            "key_findings": [],
+            "recommendations": ["Search in a different location or expand search radius."],
+            "analytics": None,
+        }
+
+    names = [m.get("name") or "Unknown" for m in markets_data]
+    ratings = [_rating(m) for m in markets_data]
+    rated = np.array([r for r in ratings if r is not None], dtype=np.float64)
+    has_phone = [bool(m.get("phone")) for m in markets_data]
+    located = [(name, coords) for name, coords in zip(names, map(_coords, markets_data)) if coords is not None]
+
+    total = len(markets_data)
+    average_rating = round(float(rated.mean()), 1) if len(rated) else 0.0
+    phones = sum(has_phone)
+    clusters = proximity_clusters(
+        [name for name, _ in located],
+        np.array([coords for _, coords in located], dtype=np.float64).reshape(-1, 2),
+        cluster_radius_km,
+    )
+
+    ranked = sorted(
+        (i for i, r in enumerate(ratings) if r is not None),
+        key=lambda i: (-ratings[i], names[i]),
+    )
+    top = [
+        {"name": names[i], "rating": ratings[i], "phone": markets_data[i].get("phone")}
+        for i in ranked[:3]
+    ]
+
+    analytics = {
+        "rated_markets": int(len(rated)),
+        "rating_distribution": rating_distribution(ratings),
+        "rating_range": [float(rated.min()), float(rated.max())] if len(rated) else None,
+        "phone_available": phones,
+        "phone_coverage": round(phones / total, 3),
+        "top_rated": top,
+        "clusters": clusters,
+        "cluster_radius_km": cluster_radius_km,
+    }
+
+    # Templated narrative
+    key_findings = []
+    if top:
+        key_findings.append(f"{top[0]['name']} has the highest rating ({top[0]['rating']:.1f}/5) of the {total} markets.")
+    if len(rated):
+        strong = analytics["rating_distribution"]["4.5+"] + analytics["rating_distribution"]["4.0-4.5"]
+        key_findings.append(f"{strong} of {len(rated)} rated markets score 4.0 or higher (average {average_rating:.1f}).")
+    key_findings.append(f"{phones} of {total} markets list a phone number, so they can be contacted before the trip.")
+    if clusters and clusters[0]["count"] > 1:
+        key_findings.append(
+            f"{clusters[0]['count']} markets lie within {clusters[0]['span_km']:.1f} km of each other, "
+            f"making it easy to compare buyers in one trip."
+        )
+    elif located:
+        key_findings.append("Markets are spread out; plan routes around a single destination per trip.")
+
+    recommendations = []
+    contactable = [t for t in top if t["phone"]]
+    if contactable:
+        recommendations.append(
+            "Call " + ", ".join(t["name"] for t in contactable) + " ahead of landing to agree on prices and volumes."
+        )
+    if clusters and clusters[0]["count"] > 1:
+        recommendations.append(
+            "Bring the catch to the area around "
+            f"({clusters[0]['center']['lat']:.4f}, {clusters[0]['center']['lng']:.4f}) to visit "
+            + ", ".join(clusters[0]["markets"][:4]) + " in one run."
+        )
+    if phones < total:
+        recommendations.append(f"Visit the {total - phones} markets without a listed phone in person to check demand.")
+    if len(rated) < total:
+        recommendations.append("Treat unrated markets with caution until buyer reliability is confirmed.")
+    recommendations.append("Compare offers from at least two highly rated markets before selling.")
+
+    summary = (
+        f"{total} fish markets are available for selling, with an average rating of {average_rating:.1f}/5. "
+        f"{phones} can be reached by phone"
+        + (f" and {clusters[0]['count']} are clustered close together." if clusters and clusters[0]["count"] > 1 else ".")
+    )
+
+    return {
+        "summary": summary,
+        "total_markets": total,
+        "average_rating": average_rating,
+        "key_findings": key_findings,
+        "recommendations": recommendations,
+        "analytics": analytics,
+    }
@@ -0,0 +1,151 @@
+"""
+TTL + LRU cache for Google Places API responses.
+
+Responses are keyed by endpoint path plus normalized parameters (API key
+dropped, parameters sorted, search coordinates quantized so nearby callers
+share an entry). Nearby searches and place details get separate TTLs. The
+in-memory tier is a bounded LRU; an optional SQLite file adds a second tier
+that survives restarts.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+NEARBY_PATH = "nearbysearch/json"
+DETAILS_PATH = "details/json"
+
+# Seconds a cached response stays valid, per endpoint path
+DEFAULT_TTLS = {
+    NEARBY_PATH: 15 * 60,
+    DETAILS_PATH: 7 * 24 * 3600,  # phone numbers and addresses rarely change
+}
+
+# Decimal places kept from search coordinates (3 ~ 110 m)
+DEFAULT_COORD_PRECISION = 3
+
+
+def quantize_location(location: str, precision: int = DEFAULT_COORD_PRECISION) -> str:
+    """Round a "lat,lng" parameter so searches from nearly the same spot share a key."""
+    try:
+        lat, lng = (float(part) for part in location.split(","))
+    except ValueError:
+        return location
+    return f"{round(lat, precision):.{precision}f},{round(lng, precision):.{precision}f}"
+
+
+class PlacesCache:
+    """Bounded LRU of Places responses with per-path TTLs and an optional SQLite tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttls: Optional[Dict[str, float]] = None,
+        db_path: Optional[str] = None,
+        coord_precision: int = DEFAULT_COORD_PRECISION,
+    ):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.coord_precision = coord_precision
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS places_cache (key TEXT PRIMARY KEY, expires REAL, value TEXT)"
+            )
+            self._db.execute("DELETE FROM places_cache WHERE expires <= ?", (time.time(),))
+
+    def normalize(self, path: str, params: dict) -> dict:
+        """Parameters actually sent upstream: nearby search coordinates are quantized."""
+        params = {name: value for name, value in params.items() if name != "key"}
+        if path == NEARBY_PATH and "location" in params:
+            params["location"] = quantize_location(str(params["location"]), self.coord_precision)
+        return params
+
+    def key(self, path: str, params: dict) -> str:
+        """Cache key for normalized parameters."""
+        return path + "?" + json.dumps(params, sort_keys=True, default=str)
+
+    def ttl(self, path: str) -> float:
+        return self.ttls.get(path, self.ttls[NEARBY_PATH])
+
+    def get(self, key: str) -> Optional[dict]:
+        """Cached response, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires, value FROM places_cache WHERE key = ? AND expires > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[1])
+                    self._store(key, row[0], value)
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        expires = time.time() + ttl
+        with self._lock:
+            self._store(key, expires, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO places_cache (key, expires, value) VALUES (?, ?, ?)",
+                    (key, expires, json.dumps(value)),
+                )
+
+    def _store(self, key: str, expires: float, value: dict) -> None:
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM places_cache")
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_tier": self.db_path,
+            "ttls": self.ttls,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
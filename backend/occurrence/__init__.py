@@ -0,0 +1,4 @@
+"""Fish occurrence data store package."""
+from .store import OccurrenceStore
+
+__all__ = ['OccurrenceStore']
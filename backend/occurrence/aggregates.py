@@ -0,0 +1,108 @@
+"""
+Pre-grouped aggregates behind /fish-stats and /fish-species.
+
+At load the store is reduced once to one row per (country, family, species)
+group holding its record count and year/depth extremes. Full and filtered
+statistics are then computed from these few thousand groups instead of
+rescanning every record, and cached until the store is replaced.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _codes(column: pd.Series) -> np.ndarray:
+    """Categorical codes shifted by one so null is 0."""
+    return column.array.codes.astype(np.int64) + 1
+
+
+def _depth(value) -> float:
+    """Depths are stored as float32; round away the float32 noise (999.9755859375 -> 999.98)."""
+    return round(float(value), 2)
+
+
+def _extreme(values: np.ndarray, func, cast) -> Optional[float]:
+    values = values[~np.isnan(values)]
+    return cast(func(values)) if len(values) else None
+
+
+class OccurrenceAggregates:
+    """Per-(country, family, species) counts and extremes with cached rollups."""
+
+    def __init__(self, df: pd.DataFrame):
+        self._names: Dict[str, List[Optional[str]]] = {
+            col: [None] + [str(value) for value in df[col].cat.categories]
+            for col in ('country', 'family', 'scientificName')
+        }
+        country = _codes(df['country'])
+        family = _codes(df['family'])
+        species = _codes(df['scientificName'])
+        n_family = len(self._names['family'])
+        n_species = len(self._names['scientificName'])
+
+        keys = (country * n_family + family) * n_species + species
+        groups, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        starts = np.searchsorted(inverse[order], np.arange(len(groups)))
+
+        self.count = np.bincount(inverse, minlength=len(groups))
+        self.country = groups // (n_family * n_species)
+        self.family = (groups // n_species) % n_family
+        self.species = groups % n_species
+        # fmin/fmax ignore NaN, so a group is NaN only when every record lacks the value
+        if len(groups):
+            self.min_year = np.fmin.reduceat(df['year'].to_numpy()[order], starts)
+            self.max_year = np.fmax.reduceat(df['year'].to_numpy()[order], starts)
+            self.min_depth = np.fmin.reduceat(df['minimumDepthInMeters'].to_numpy()[order], starts)
+            self.max_depth = np.fmax.reduceat(df['maximumDepthInMeters'].to_numpy()[order], starts)
+        else:
+            self.min_year = self.max_year = self.min_depth = self.max_depth = np.empty(0, dtype=np.float32)
+
+        self._lookup = {
+            col: {name: code for code, name in enumerate(names) if name is not None}
+            for col, names in self._names.items()
+        }
+        self.stats = lru_cache(maxsize=256)(self._stats)
+        self.species_counts = lru_cache(maxsize=256)(self._species_counts)
+
+    def _mask(self, country: Optional[str], family: Optional[str]) -> np.ndarray:
+        mask = np.ones(len(self.count), dtype=bool)
+        if country is not None:
+            mask &= self.country == self._lookup['country'].get(country, -1)
+        if family is not None:
+            mask &= self.family == self._lookup['family'].get(family, -1)
+        return mask
+
+    def _top(self, col: str, codes: np.ndarray, counts: np.ndarray, limit: Optional[int] = None) -> Dict[str, int]:
+        """value_counts() over the groups: descending counts, nulls excluded."""
+        totals = np.bincount(codes, weights=counts, minlength=len(self._names[col])).astype(np.int64)
+        totals[0] = 0
+        order = np.argsort(-totals, kind='stable')
+        order = order[totals[order] > 0][:limit]
+        return {self._names[col][code]: int(totals[code]) for code in order}
+
+    def _species_counts(self, country: Optional[str] = None, family: Optional[str] = None, limit: int = 50) -> Dict[str, int]:
+        mask = self._mask(country, family)
+        return self._top('scientificName', self.species[mask], self.count[mask], limit)
+
+    def _stats(self, country: Optional[str] = None, family: Optional[str] = None) -> dict:
+        mask = self._mask(country, family)
+        counts = self.count[mask]
+        species = self.species[mask]
+        return {
+            "total_records": int(counts.sum()),
+            "unique_species": int(len(np.unique(species[species > 0]))),
+            "countries": self._top('country', self.country[mask], counts),
+            "top_families": self._top('family', self.family[mask], counts, 10),
+            "top_species": self._top('scientificName', species, counts, 10),
+            "date_range": {
+                "min_year": _extreme(self.min_year[mask], np.min, int),
+                "max_year": _extreme(self.max_year[mask], np.max, int),
+            },
+            "depth_range": {
+                "min": _extreme(self.min_depth[mask], np.min, _depth),
+                "max": _extreme(self.max_depth[mask], np.max, _depth),
+            }
+        }
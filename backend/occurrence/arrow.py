@@ -0,0 +1,108 @@
+"""
+Arrow IPC (Feather v2) storage for the occurrence dataset.
+
+The file holds exactly the projected store columns, already filtered to fish
+records with coordinates: categoricals as dictionary arrays and coordinates,
+depths and year as float32. Written uncompressed it can be memory-mapped, so
+worker startup skips CSV parsing entirely. pyarrow is only needed here.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+
+from .store import CATEGORICAL_COLUMNS, FLOAT32_COLUMNS, OCCURRENCE_COLUMNS
+
+ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+
+# dtypes for reading raw GBIF chunks: strings stay plain until the whole file is dictionary-encoded
+READ_DTYPES = {
+    col: ('float32' if col in FLOAT32_COLUMNS else str) for col in OCCURRENCE_COLUMNS
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Arrow occurrence files (pip install pyarrow)") from e
+    return pyarrow
+
+
+def is_arrow_path(path: Union[str, Path]) -> bool:
+    return Path(path).suffix.lower() in ARROW_SUFFIXES
+
+
+def frame_to_table(df: pd.DataFrame):
+    """Convert a chunk of projected rows (read with READ_DTYPES) to an Arrow table with plain strings."""
+    pa = _pyarrow()
+    fields = [
+        pa.field(col, pa.float32() if col in FLOAT32_COLUMNS else pa.string())
+        for col in OCCURRENCE_COLUMNS
+    ]
+    return pa.Table.from_pandas(df[OCCURRENCE_COLUMNS], schema=pa.schema(fields), preserve_index=False)
+
+
+def finalize_table(tables: Iterable):
+    """
+    Concatenate converted chunks into the on-disk layout.
+
+    Categorical columns become dictionary arrays with one sorted dictionary for
+    the whole file (matching the categories a CSV load produces), and 'id'
+    becomes int64 when every value is numeric.
+    """
+    pa = _pyarrow()
+    pc = pa.compute
+    # Drop the pandas metadata of the chunks so readers use the Arrow types below
+    table = pa.concat_tables(list(tables)).combine_chunks().replace_schema_metadata(None)
+    for col in CATEGORICAL_COLUMNS:
+        values = table[col].combine_chunks()
+        unique = pc.unique(values.drop_null())
+        dictionary = pc.take(unique, pc.array_sort_indices(unique))
+        indices = pc.cast(pc.index_in(values, value_set=dictionary), pa.int32())
+        encoded = pa.DictionaryArray.from_arrays(indices, dictionary)
+        table = table.set_column(table.schema.get_field_index(col), col, encoded)
+    try:
+        index = table.schema.get_field_index('id')
+        table = table.set_column(index, 'id', pc.cast(table['id'], pa.int64()))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        pass
+    return table
+
+
+def write_arrow(table, path: Union[str, Path], compression: Optional[str] = None) -> None:
+    """Write an Arrow IPC file atomically (compression must be None for memory mapping)."""
+    pa = _pyarrow()
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    os.close(fd)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    try:
+        with pa.OSFile(tmp, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_arrow(path: Union[str, Path]) -> pd.DataFrame:
+    """Memory-map an Arrow IPC occurrence file into a DataFrame of store dtypes."""
+    pa = _pyarrow()
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    # Dictionary arrays become categoricals; numeric columns without nulls stay zero-copy
+    df = table.to_pandas(split_blocks=True)
+    for col in OCCURRENCE_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.Series(pd.NA, index=df.index, dtype='category' if col in CATEGORICAL_COLUMNS else 'object')
+        elif col in CATEGORICAL_COLUMNS and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+        elif col in FLOAT32_COLUMNS and df[col].dtype != 'float32':
+            df[col] = df[col].astype('float32')
+    return df[OCCURRENCE_COLUMNS]
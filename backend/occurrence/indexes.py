@@ -0,0 +1,249 @@
+"""
+Row-id indexes over the occurrence store.
+
+Every index returns ascending row positions (int32) into the store frame so
+results from different indexes can be intersected directly and the caller
+only materializes the rows it returns.
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Columns with per-value posting lists
+INDEXED_COLUMNS = ['scientificName', 'genus', 'family', 'country']
+
+# Fish type presets used by the frontend; each preset is an OR of (column, value) clauses
+FISH_TYPE_FILTERS: List[Tuple[str, List[Tuple[str, str]]]] = [
+    ("Tuna (Thunnus)", [('genus', 'Thunnus'), ('family', 'Scombridae')]),
+    ("Katsuwonus pelamis", [('scientificName', 'Katsuwonus pelamis')]),
+    ("Thunnus albacares", [('scientificName', 'Thunnus albacares')]),
+    ("Thunnus alalunga", [('scientificName', 'Thunnus alalunga')]),
+    ("Anguilla japonica", [('scientificName', 'Anguilla japonica')]),
+    ("Myctophidae", [('family', 'Myctophidae')]),
+]
+
+EMPTY_ROWS = np.empty(0, dtype=np.int32)
+
+
+def fish_type_preset(fish_type: Optional[str]) -> str:
+    """
+    Resolve a fish type label to its FISH_TYPE_FILTERS key.
+
+    "Tuna (Thunnus)" must match exactly; the other presets match when their
+    scientific name appears in the label (e.g. "Yellowfin (Thunnus albacares)").
+    Returns "All Fish" for unknown labels.
+    """
+    if not fish_type or fish_type == "All Fish":
+        return "All Fish"
+    for key, _ in FISH_TYPE_FILTERS:
+        matched = fish_type == key if key == "Tuna (Thunnus)" else key in fish_type
+        if matched:
+            return key
+    return "All Fish"
+
+
+def preset_slug(fish_type: Optional[str]) -> str:
+    """File-name friendly key of the preset a label resolves to ("Tuna (Thunnus)" -> "tuna-thunnus")."""
+    return re.sub(r'[^a-z0-9]+', '-', fish_type_preset(fish_type).lower()).strip('-')
+
+
+def intersect_rows(row_sets: Sequence[np.ndarray]) -> np.ndarray:
+    """Intersect ascending, unique row-id arrays, smallest first."""
+    row_sets = sorted(row_sets, key=len)
+    rows = row_sets[0]
+    for other in row_sets[1:]:
+        if len(rows) == 0:
+            break
+        rows = rows[np.isin(rows, other, assume_unique=True)]
+    return rows
+
+
+def rows_after(rows: np.ndarray, after: int) -> np.ndarray:
+    """Suffix of an ascending row-id array with ids greater than after."""
+    return rows[np.searchsorted(rows, after, side='right'):]
+
+
+def _prefixed(arrays: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+
+class PostingIndex:
+    """Posting lists (ascending row ids) for each value of one categorical column."""
+
+    def __init__(self, column: pd.Series):
+        codes = column.cat.codes.to_numpy()
+        categories = column.cat.categories
+        # Stable sort keeps row ids ascending inside every posting list; nulls (-1) sort first
+        self._rows = np.argsort(codes, kind='stable').astype(np.int32)
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        n_null = int((codes < 0).sum())
+        self._bounds = n_null + np.concatenate([[0], np.cumsum(counts)])
+        self._lookup: Dict[str, int] = {value: i for i, value in enumerate(categories)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], categories) -> "PostingIndex":
+        """Rebuild from arrays() output (e.g. memory-mapped from a shared snapshot)."""
+        index = cls.__new__(cls)
+        index._rows = arrays['rows']
+        index._bounds = arrays['bounds']
+        index._lookup = {value: i for i, value in enumerate(categories)}
+        return index
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {'rows': self._rows, 'bounds': self._bounds}
+
+    def rows(self, value: str) -> np.ndarray:
+        """Ascending row ids where the column equals value (a read-only view)."""
+        code = self._lookup.get(value)
+        if code is None:
+            return EMPTY_ROWS
+        return self._rows[self._bounds[code]:self._bounds[code + 1]]
+
+    def count(self, value: str) -> int:
+        return len(self.rows(value))
+
+
+class SortedIndex:
+    """Rows ordered by a numeric column, for range lookups (nulls are excluded)."""
+
+    def __init__(self, values: np.ndarray):
+        valid = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[valid], kind='stable')
+        self._rows = valid[order].astype(np.int32)
+        self._values = values[self._rows]
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "SortedIndex":
+        index = cls.__new__(cls)
+        index._rows = arrays['rows']
+        index._values = arrays['values']
+        return index
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {'rows': self._rows, 'values': self._values}
+
+    def rows_between(self, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Ascending row ids with low <= value <= high."""
+        start = 0 if low is None else np.searchsorted(self._values, low, side='left')
+        stop = len(self._values) if high is None else np.searchsorted(self._values, high, side='right')
+        return np.sort(self._rows[start:stop])
+
+
+class FilterIndex:
+    """Posting lists for the categorical filters plus sorted depth indexes."""
+
+    def __init__(self, df: pd.DataFrame, arrays: Optional[Dict[str, np.ndarray]] = None):
+        """Build the indexes from df, or reuse prebuilt arrays() output for the same frame."""
+        self._n_rows = len(df)
+        self._min_depth = df['minimumDepthInMeters'].to_numpy()
+        self._max_depth = df['maximumDepthInMeters'].to_numpy()
+        if arrays is None:
+            self.postings = {col: PostingIndex(df[col]) for col in INDEXED_COLUMNS}
+            self.min_depth = SortedIndex(self._min_depth)
+            self.max_depth = SortedIndex(self._max_depth)
+        else:
+            self.postings = {
+                col: PostingIndex.from_arrays(_prefixed(arrays, f'{col}.'), df[col].cat.categories)
+                for col in INDEXED_COLUMNS
+            }
+            self.min_depth = SortedIndex.from_arrays(_prefixed(arrays, 'min_depth.'))
+            self.max_depth = SortedIndex.from_arrays(_prefixed(arrays, 'max_depth.'))
+        # Row ids of every fish type preset, unions of several posting lists included, built once
+        prebuilt = _prefixed(arrays or {}, 'preset.')
+        self.presets: Dict[str, np.ndarray] = {
+            key: prebuilt[preset_slug(key)] if preset_slug(key) in prebuilt else self._clause_rows(clauses)
+            for key, clauses in FISH_TYPE_FILTERS
+        }
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Every index array, keyed by a flat name (see __init__)."""
+        arrays = {}
+        for col, posting in self.postings.items():
+            arrays.update({f'{col}.{name}': array for name, array in posting.arrays().items()})
+        arrays.update({f'min_depth.{name}': array for name, array in self.min_depth.arrays().items()})
+        arrays.update({f'max_depth.{name}': array for name, array in self.max_depth.arrays().items()})
+        # Single-clause presets are views of a posting list and need no copy
+        arrays.update({
+            f'preset.{preset_slug(key)}': self.presets[key]
+            for key, clauses in FISH_TYPE_FILTERS if len(clauses) > 1
+        })
+        return arrays
+
+    def _clause_rows(self, clauses: List[Tuple[str, str]]) -> np.ndarray:
+        """Union of the posting lists for OR-ed (column, value) clauses."""
+        rows = [self.postings[col].rows(value) for col, value in clauses]
+        if len(rows) == 1:
+            return rows[0]
+        mask = np.zeros(self._n_rows, dtype=bool)
+        for posting in rows:
+            mask[posting] = True
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def _depth_mask(self, rows: np.ndarray, min_depth: Optional[float], max_depth: Optional[float]) -> np.ndarray:
+        mask = np.ones(len(rows), dtype=bool)
+        if min_depth is not None:
+            mask &= self._min_depth[rows] >= min_depth
+        if max_depth is not None:
+            mask &= self._max_depth[rows] <= max_depth
+        return mask
+
+    def select(
+        self,
+        fish_type: Optional[str] = None,
+        country: Optional[str] = None,
+        min_depth: Optional[float] = None,
+        max_depth: Optional[float] = None,
+        limit: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+        after: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Ascending row ids matching every filter, truncated to limit.
+
+        rows optionally restricts the search to a precomputed ascending candidate set,
+        and after (a row id, used as a pagination cursor) skips every row up to it.
+        Depth filters are checked chunk by chunk against the candidates so a small
+        limit stops early instead of testing every matching row.
+        """
+        row_sets = [] if rows is None else [rows]
+        preset = fish_type_preset(fish_type)
+        if preset in self.presets:
+            row_sets.append(self.presets[preset])
+        if country:
+            row_sets.append(self.postings['country'].rows(country))
+        if after is not None:
+            row_sets = [rows_after(row_set, after) for row_set in row_sets]
+
+        has_depth = min_depth is not None or max_depth is not None
+        if not row_sets:
+            first = 0 if after is None else max(after + 1, 0)
+            if not has_depth:
+                stop = self._n_rows if limit is None else min(first + limit, self._n_rows)
+                return np.arange(first, max(stop, first), dtype=np.int32)
+            # Depth is the only filter: answer it from the sorted indexes
+            depth_sets = []
+            if min_depth is not None:
+                depth_sets.append(self.min_depth.rows_between(low=min_depth))
+            if max_depth is not None:
+                depth_sets.append(self.max_depth.rows_between(high=max_depth))
+            return rows_after(intersect_rows(depth_sets), first - 1)[:limit]
+
+        candidates = intersect_rows(row_sets)
+        if not has_depth:
+            return candidates[:limit]
+
+        if limit is None:
+            return candidates[self._depth_mask(candidates, min_depth, max_depth)]
+        matched = []
+        found = 0
+        chunk = max(4 * limit, 1024)
+        for start in range(0, len(candidates), chunk):
+            block = candidates[start:start + chunk]
+            block = block[self._depth_mask(block, min_depth, max_depth)]
+            matched.append(block)
+            found += len(block)
+            if found >= limit:
+                break
+        return np.concatenate(matched)[:limit] if matched else EMPTY_ROWS
@@ -0,0 +1,80 @@
+"""
+JSON serialization for occurrence rows straight from the column arrays.
+
+Nulls are resolved per column with NumPy (categorical code -1, NaN floats,
+missing strings) and the payload is encoded by orjson, which writes numpy
+arrays and scalars natively and emits NaN as null. This skips the per-cell
+pd.isna loop and FastAPI's jsonable_encoder for large responses.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+import orjson
+import pandas as pd
+
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+def _values(column: pd.Series) -> np.ndarray:
+    """Column values with every null as None (numeric NaN is left for orjson to write as null)."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Look up codes in the dictionary; the extra trailing slot maps code -1 to None
+        lookup = np.empty(len(column.cat.categories) + 1, dtype=object)
+        lookup[:-1] = column.cat.categories.to_numpy(dtype=object)
+        lookup[-1] = None
+        return lookup[column.cat.codes.to_numpy()]
+    values = column.to_numpy()
+    if values.dtype.kind == 'f':
+        return values
+    if values.dtype.kind in 'iub':
+        return values
+    values = values.astype(object)
+    values[pd.isna(values)] = None
+    return values
+
+
+def record_rows(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Row dicts for orjson (values may be numpy scalars)."""
+    names = list(frame.columns)
+    columns = [_values(frame[name]) for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def column_payload(frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Columnar form of a frame: one array per column.
+
+    Categorical columns are sent dictionary-encoded as
+    {"dictionary": [...], "codes": [...]} where code -1 means null.
+    """
+    columns: Dict[str, Any] = {}
+    for name in frame.columns:
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            used = np.unique(codes[codes >= 0])
+            # Re-number so only the values present in this response are shipped
+            remap = np.full(len(column.cat.categories) + 1, -1, dtype=np.int32)
+            remap[used] = np.arange(len(used), dtype=np.int32)
+            columns[name] = {
+                "dictionary": column.cat.categories.to_numpy(dtype=object)[used].tolist(),
+                "codes": remap[codes],
+            }
+        else:
+            values = _values(column)
+            # orjson only encodes numeric numpy arrays natively
+            columns[name] = values.tolist() if values.dtype == object else values
+    return columns
+
+
+def ndjson_lines(frame: pd.DataFrame) -> bytes:
+    """Newline-delimited JSON records (one object per line, trailing newline included)."""
+    records = record_rows(frame)
+    if not records:
+        return b""
+    return b"\n".join(orjson.dumps(record, option=JSON_OPTIONS) for record in records) + b"\n"
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a payload that may contain numpy arrays/scalars."""
+    return orjson.dumps(payload, option=JSON_OPTIONS)
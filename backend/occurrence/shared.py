@@ -0,0 +1,195 @@
+"""
+Shared-memory occurrence store for multi-worker deployments.
+
+One process publishes the prepared store as a snapshot directory (ideally on
+/dev/shm): one .npy file per numeric column and categorical code array, an
+Arrow file for free-text columns, and the filter/spatial index arrays. Every
+uvicorn worker memory-maps the same files, so the pages live once in the OS
+page cache instead of once per worker, and attaching skips parsing and
+index building.
+
+Publish ahead of time with:
+    python -m occurrence.shared data/occurrence.arrow /dev/shm/fish-store
+or set FISH_SHARED_STORE and let the first worker publish under a file lock.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from .segments import apply_segments, list_segments, segmented_version
+from .store import OccurrenceStore, _file_version
+
+SNAPSHOT_FORMAT = 1
+MANIFEST = "manifest.json"
+STRINGS_FILE = "strings.arrow"
+# Resolve-and-attach rounds before giving up when snapshots keep being replaced
+ATTACH_ATTEMPTS = 3
+
+
+def expected_version(base_path: Union[str, Path], segment_dir: Union[str, Path]) -> str:
+    """Version a fresh load of the base dataset plus its segments would have."""
+    return segmented_version(_file_version(base_path), [path.name for path in list_segments(segment_dir)])
+
+
+def snapshot_dir(root: Union[str, Path], version: str) -> Path:
+    return Path(root) / f"store-{hashlib.sha1(version.encode()).hexdigest()[:16]}"
+
+
+@contextmanager
+def _publish_lock(root: Path):
+    """Exclusive lock so only one process publishes a snapshot."""
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def publish(store: OccurrenceStore, root: Union[str, Path]) -> Path:
+    """Write the store's columns and indexes as a snapshot directory (no-op if already published)."""
+    from .arrow import _pyarrow
+
+    root = Path(root)
+    directory = snapshot_dir(root, store.version)
+    if (directory / MANIFEST).exists():
+        return directory
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=root))
+
+    columns = {}
+    strings = {}
+    for col in store.df.columns:
+        series = store.df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            np.save(tmp / f"{col}.codes.npy", series.array.codes)
+            columns[col] = {"kind": "categorical", "categories": [str(value) for value in series.cat.categories]}
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'fiub':
+            np.save(tmp / f"{col}.npy", series.to_numpy())
+            columns[col] = {"kind": "numeric"}
+        else:
+            values = series.astype(object).where(series.notna(), None).to_numpy()
+            strings[col] = values
+            columns[col] = {"kind": "string"}
+
+    if strings:
+        pa = _pyarrow()
+        table = pa.table({col: pa.array(values, type=pa.large_string()) for col, values in strings.items()})
+        with pa.OSFile(str(tmp / STRINGS_FILE), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    for group, arrays in store.index_arrays().items():
+        for name, array in arrays.items():
+            np.save(tmp / f"index.{group}.{name}.npy", np.ascontiguousarray(array))
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": store.version,
+        "segments": list(store.segments),
+        "rows": len(store),
+        "cell_deg": store.spatial.cell_deg,
+        "columns": columns,
+    }
+    (tmp / MANIFEST).write_text(json.dumps(manifest))
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        # Another process published the same version first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return directory
+
+
+def attach(directory: Union[str, Path]) -> OccurrenceStore:
+    """Memory-map a published snapshot into a store (columns and indexes are zero-copy)."""
+    directory = Path(directory)
+    manifest = json.loads((directory / MANIFEST).read_text())
+    if manifest["format"] != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported shared store format in {directory}")
+
+    strings = None
+    data = {}
+    for col, spec in manifest["columns"].items():
+        if spec["kind"] == "categorical":
+            codes = np.load(directory / f"{col}.codes.npy", mmap_mode='r')
+            data[col] = pd.Series(pd.Categorical.from_codes(codes, categories=spec["categories"], validate=False), copy=False)
+        elif spec["kind"] == "numeric":
+            data[col] = pd.Series(np.load(directory / f"{col}.npy", mmap_mode='r'), copy=False)
+        else:
+            if strings is None:
+                from .arrow import _pyarrow
+                pa = _pyarrow()
+                strings = pa.ipc.open_file(pa.memory_map(str(directory / STRINGS_FILE), 'r')).read_all()
+            data[col] = pd.Series(pd.arrays.ArrowStringArray(strings[col]), copy=False)
+    df = pd.DataFrame(data, copy=False)
+
+    index_arrays = {"filters": {}, "spatial": {}}
+    for path in directory.glob("index.*.npy"):
+        _, group, name = path.name[:-len(".npy")].split(".", 2)
+        index_arrays[group][name] = np.load(path, mmap_mode='r')
+
+    store = OccurrenceStore(df, version=manifest["version"], segments=tuple(manifest["segments"]), index_arrays=index_arrays)
+    store.shared_path = str(directory)
+    return store
+
+
+def remove_stale_snapshots(root: Union[str, Path], keep: Path) -> None:
+    """
+    Delete older snapshots.
+
+    Workers still mapping them keep their pages until they swap stores (unlinked
+    files stay readable while mapped).
+    """
+    for path in Path(root).glob("store-*"):
+        if path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_shared(root: Union[str, Path], base_path: Union[str, Path], segment_dir: Union[str, Path]) -> OccurrenceStore:
+    """
+    Attach to the snapshot of the current dataset, publishing it first if needed.
+
+    Only the process holding the publish lock loads the dataset; the others wait
+    for it and then attach to the same files. If the snapshot is removed while
+    attaching (another process published a newer version), the current version
+    is resolved again.
+    """
+    root = Path(root)
+    for attempt in range(ATTACH_ATTEMPTS):
+        directory = snapshot_dir(root, expected_version(base_path, segment_dir))
+        if not (directory / MANIFEST).exists():
+            with _publish_lock(root):
+                if not (directory / MANIFEST).exists():
+                    store = OccurrenceStore.load(base_path)
+                    store = apply_segments(store, segment_dir) or store
+                    directory = publish(store, root)
+                    remove_stale_snapshots(root, keep=directory)
+        try:
+            return attach(directory)
+        except FileNotFoundError:
+            if attempt == ATTACH_ATTEMPTS - 1:
+                raise
+            print(f"Shared store {directory} was replaced while attaching; retrying")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Publish the occurrence store for shared-memory workers")
+    parser.add_argument("data", help="Base dataset (occurrence.arrow or occurrence_parsed.csv)")
+    parser.add_argument("root", help="Snapshot root shared by the workers, e.g. /dev/shm/fish-store")
+    parser.add_argument("--segments", default=str(Path(__file__).parent.parent / "data" / "segments"))
+    args = parser.parse_args()
+
+    shared = load_shared(args.root, args.data, args.segments)
+    print(f"Published {len(shared)} records to {shared.shared_path}")
@@ -0,0 +1,136 @@
+"""
+Grid bucket spatial index over occurrence coordinates.
+
+Rows are sorted by a fixed lat/lng grid cell so every cell is one contiguous
+slice, and a bounding box touches at most one slice per grid row. Candidates
+from the covered cells are then checked exactly against the query shape.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2 = np.radians(lats.astype(np.float64))
+    dlat = lat2 - lat1
+    dlng = np.radians(lngs.astype(np.float64)) - lng1
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def radius_bbox(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Bounding box (west, south, east, north) that contains a radius around a point."""
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    south, north = lat - dlat, lat + dlat
+    if south <= -90 or north >= 90 or angular >= math.pi / 2:
+        # The circle reaches a pole: every longitude is in range
+        return -180.0, max(south, -90.0), 180.0, min(north, 90.0)
+    dlng = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(lat)))))
+    west, east = lng - dlng, lng + dlng
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return west, south, east, north
+
+
+class GridIndex:
+    """Uniform grid of lat/lng buckets holding ascending row ids."""
+
+    def __init__(
+        self,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        cell_deg: float = 1.0,
+        arrays: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """Bucket the points, or reuse prebuilt arrays() output for the same points."""
+        self.cell_deg = cell_deg
+        self.n_lat = int(math.ceil(180 / cell_deg))
+        self.n_lng = int(math.ceil(360 / cell_deg))
+        self._lats = lats
+        self._lngs = lngs
+
+        if arrays is not None:
+            self._rows = arrays['rows']
+            self._starts = arrays['starts']
+            return
+        cells = self._cell_ids(lats, lngs)
+        self._rows = np.argsort(cells, kind='stable').astype(np.int32)
+        # _starts[c] .. _starts[c + 1] is the slice of _rows that falls in cell c
+        self._starts = np.searchsorted(cells[self._rows], np.arange(self.n_lat * self.n_lng + 1))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {'rows': self._rows, 'starts': self._starts}
+
+    def _lat_cell(self, lat):
+        return np.clip(np.floor((np.asarray(lat, dtype=np.float64) + 90) / self.cell_deg), 0, self.n_lat - 1).astype(np.int64)
+
+    def _lng_cell(self, lng):
+        return np.clip(np.floor((np.asarray(lng, dtype=np.float64) + 180) / self.cell_deg), 0, self.n_lng - 1).astype(np.int64)
+
+    def _cell_ids(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        return self._lat_cell(lats) * self.n_lng + self._lng_cell(lngs)
+
+    def _candidates(self, south: float, north: float, lng_ranges: List[Tuple[float, float]]) -> np.ndarray:
+        """Rows in every cell overlapping the box (unsorted, may include rows just outside it)."""
+        lat0, lat1 = int(self._lat_cell(south)), int(self._lat_cell(north))
+        slices = []
+        for west, east in lng_ranges:
+            lng0, lng1 = int(self._lng_cell(west)), int(self._lng_cell(east))
+            for lat_cell in range(lat0, lat1 + 1):
+                base = lat_cell * self.n_lng
+                start, stop = self._starts[base + lng0], self._starts[base + lng1 + 1]
+                if stop > start:
+                    slices.append(self._rows[start:stop])
+        if not slices:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(slices)
+
+    def bbox(self, west: float, south: float, east: float, north: float) -> np.ndarray:
+        """
+        Ascending row ids inside a bounding box.
+
+        A box with west > east crosses the antimeridian.
+        """
+        if south > north:
+            south, north = north, south
+        lng_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        rows = self._candidates(south, north, lng_ranges)
+
+        lats, lngs = self._lats[rows], self._lngs[rows]
+        mask = (lats >= south) & (lats <= north)
+        if west <= east:
+            mask &= (lngs >= west) & (lngs <= east)
+        else:
+            mask &= (lngs >= west) | (lngs <= east)
+        return np.sort(rows[mask])
+
+    def radius(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Ascending row ids within radius_km (great-circle) of a point."""
+        rows = self.bbox(*radius_bbox(lat, lng, radius_km))
+        if len(rows) == 0:
+            return rows
+        distances = haversine_km(lat, lng, self._lats[rows], self._lngs[rows])
+        return rows[distances <= radius_km]
+
+    def query(
+        self,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+    ) -> Optional[np.ndarray]:
+        """Rows matching the spatial filters, or None when no spatial filter was given."""
+        rows = None
+        if bbox is not None:
+            rows = self.bbox(*bbox)
+        if near is not None:
+            in_radius = self.radius(near[0], near[1], radius_km)
+            rows = in_radius if rows is None else rows[np.isin(rows, in_radius, assume_unique=True)]
+        return rows
@@ -0,0 +1,230 @@
+"""
+Columnar in-memory store for the GBIF fish occurrence dataset.
+
+Only the columns served by the API are loaded. Low-cardinality strings are
+dictionary-encoded as pandas categoricals and coordinates/depths are
+downcast to float32, which keeps one copy per uvicorn worker small.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import OccurrenceAggregates
+from .indexes import FilterIndex
+from .spatial import GridIndex, haversine_km
+from .zones import compute_zones
+
+# Columns projected out of occurrence_parsed.csv (everything else is skipped at read time)
+OCCURRENCE_COLUMNS = [
+    'id', 'catalogNumber', 'scientificName', 'class', 'order', 'family', 'genus',
+    'decimalLatitude', 'decimalLongitude', 'country', 'eventDate', 'year',
+    'minimumDepthInMeters', 'maximumDepthInMeters', 'occurrenceStatus',
+]
+
+# Low-cardinality strings stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = [
+    'scientificName', 'class', 'order', 'family', 'genus', 'country', 'occurrenceStatus',
+]
+
+# Numeric columns where float32 precision is plenty (~1 m for coordinates)
+FLOAT32_COLUMNS = [
+    'decimalLatitude', 'decimalLongitude', 'minimumDepthInMeters', 'maximumDepthInMeters', 'year',
+]
+
+# Taxonomic classes kept by the API
+FISH_CLASSES = ['Actinopteri', 'Actinopterygii', 'Elasmobranchii', 'Myxini', 'Cephalaspidomorphi']
+
+# Columns returned by /fish-occurrences, in response order
+RECORD_COLUMNS = [
+    'id', 'catalogNumber', 'scientificName', 'family', 'order', 'genus',
+    'decimalLatitude', 'decimalLongitude', 'country', 'eventDate',
+    'year', 'minimumDepthInMeters', 'maximumDepthInMeters', 'occurrenceStatus',
+]
+
+COLUMN_DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **{col: 'float32' for col in FLOAT32_COLUMNS},
+}
+
+
+def read_occurrence_csv(path: Union[str, Path]) -> pd.DataFrame:
+    """Read the projected, typed occurrence columns from a parsed CSV file."""
+    df = pd.read_csv(
+        path,
+        usecols=lambda col: col in OCCURRENCE_COLUMNS,
+        dtype=COLUMN_DTYPES,
+    )
+    # Columns missing from the file are still exposed (as nulls) so the endpoints can rely on them
+    for col in OCCURRENCE_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.Series(pd.NA, index=df.index, dtype=COLUMN_DTYPES.get(col, 'object'))
+    return df[OCCURRENCE_COLUMNS]
+
+
+def filter_fish(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep only fish records that have coordinates.
+
+    Rows are renumbered 0..N-1 (row ids used by the indexes) and dictionary
+    entries left unused by the filter are dropped.
+    """
+    keep = df['class'].isin(FISH_CLASSES) & df['decimalLatitude'].notna() & df['decimalLongitude'].notna()
+    if keep.all():
+        # Already filtered (e.g. a converted Arrow file): avoid copying memory-mapped columns
+        return df if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 else df.reset_index(drop=True)
+    df = df[keep].reset_index(drop=True)
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def _file_version(path: Union[str, Path]) -> str:
+    stat = Path(path).stat()
+    return f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class OccurrenceStore:
+    """Immutable, column-projected table of fish occurrence records and its indexes."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        version: str = "",
+        segments: Tuple[str, ...] = (),
+        index_arrays: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+    ):
+        """
+        Wrap a prepared frame (see filter_fish) and build its indexes.
+
+        index_arrays ({"filters": ..., "spatial": ...} from index_arrays()) reuses
+        indexes built earlier for the same frame, e.g. from a shared snapshot.
+        """
+        self.df = df
+        # Identifies the dataset contents; derived artifacts (e.g. tile pyramids) are keyed on it
+        self.version = version or f"rows-{len(df)}"
+        # Names of the delta segment files appended to the base dataset
+        self.segments = segments
+        # Snapshot directory when the columns are memory-mapped from a shared store
+        self.shared_path: Optional[str] = None
+        index_arrays = index_arrays or {}
+        self.filters = FilterIndex(df, index_arrays.get('filters'))
+        self.spatial = GridIndex(
+            df['decimalLatitude'].to_numpy(),
+            df['decimalLongitude'].to_numpy(),
+            arrays=index_arrays.get('spatial'),
+        )
+        # Stats and zone aggregates are cached per store, so a reloaded dataset starts with empty caches
+        self.aggregates = OccurrenceAggregates(df)
+        self.zones = lru_cache(maxsize=64)(self._zones)
+        # The frame never changes after construction, so measure it once
+        self.nbytes = int(df.memory_usage(index=True, deep=True).sum())
+
+    @classmethod
+    def from_csv(cls, path: Union[str, Path]) -> "OccurrenceStore":
+        """Load the store from occurrence_parsed.csv, keeping only fish records."""
+        return cls(filter_fish(read_occurrence_csv(path)), version=_file_version(path))
+
+    @classmethod
+    def from_arrow(cls, path: Union[str, Path]) -> "OccurrenceStore":
+        """Load the store from an Arrow IPC file written by data/parse_occurrence.py (memory-mapped)."""
+        from .arrow import read_arrow
+        return cls(filter_fish(read_arrow(path)), version=_file_version(path))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "OccurrenceStore":
+        """Load from an Arrow IPC (.arrow/.feather) or parsed CSV file, based on the suffix."""
+        from .arrow import is_arrow_path
+        return cls.from_arrow(path) if is_arrow_path(path) else cls.from_csv(path)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def select(
+        self,
+        fish_type: Optional[str] = None,
+        country: Optional[str] = None,
+        min_depth: Optional[float] = None,
+        max_depth: Optional[float] = None,
+        limit: Optional[int] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        after: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Ascending row ids matching the /fish-occurrences filters.
+
+        bbox is (west, south, east, north); near is (lat, lng) with radius_km.
+        after is a row id cursor: only rows with larger ids are returned.
+        """
+        rows = self.spatial.query(bbox, near, radius_km)
+        return self.filters.select(fish_type, country, min_depth, max_depth, limit, rows=rows, after=after)
+
+    def take(self, rows: np.ndarray, columns: Optional[list] = None) -> pd.DataFrame:
+        """Materialize only the given rows (and columns)."""
+        df = self.df if columns is None else self.df[columns]
+        return df.take(rows)
+
+    def species_in(
+        self, rows: np.ndarray, near: Optional[Tuple[float, float]] = None
+    ) -> Tuple[List[str], np.ndarray, Optional[np.ndarray]]:
+        """
+        Distinct species among the given rows, without materializing them.
+
+        Returns the species names, their record counts and, when near is given,
+        the distance in km from near to each species' closest record. Species
+        are ordered by that distance, otherwise by descending count.
+        """
+        species = self.df['scientificName'].array
+        codes = species.codes[rows]
+        named = codes >= 0
+        codes = codes[named].astype(np.int64)
+        counts = np.bincount(codes, minlength=len(species.categories))
+        present = np.flatnonzero(counts)
+
+        nearest = None
+        if near is not None:
+            distances = haversine_km(
+                near[0], near[1],
+                self.df['decimalLatitude'].to_numpy()[rows][named],
+                self.df['decimalLongitude'].to_numpy()[rows][named],
+            )
+            closest = np.full(len(species.categories), np.inf)
+            np.minimum.at(closest, codes, distances)
+            order = np.lexsort((present, closest[present]))
+            nearest = closest[present][order]
+        else:
+            order = np.lexsort((present, -counts[present]))
+        present = present[order]
+        return [str(name) for name in species.categories[present]], counts[present], nearest
+
+    def _zones(self, grid: float, fish_type: Optional[str] = None, country: Optional[str] = None) -> List[dict]:
+        """Grid zones over every matching record (use the cached self.zones)."""
+        rows = self.select(fish_type, country)
+        return compute_zones(
+            self.df['decimalLatitude'].to_numpy()[rows],
+            self.df['decimalLongitude'].to_numpy()[rows],
+            self.df['scientificName'].array.take(rows),
+            grid,
+        )
+
+    def index_arrays(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Arrays of the filter and spatial indexes, for publishing the store."""
+        return {'filters': self.filters.arrays(), 'spatial': self.spatial.arrays()}
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Resident bytes per column (including the index)."""
+        usage = self.df.memory_usage(index=True, deep=True)
+        return {str(col): int(size) for col, size in usage.items()}
+
+    def describe(self) -> dict:
+        """Short summary used by the API root and startup logging."""
+        return {
+            "records": len(self),
+            "columns": len(self.df.columns),
+            "resident_mb": round(self.nbytes / 1024 ** 2, 2),
+            "shared": self.shared_path is not None,
+        }
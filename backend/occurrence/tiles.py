@@ -0,0 +1,242 @@
+"""
+Multi-resolution tile pyramid of aggregated occurrence counts.
+
+Every zoom level z (0..MAX_ZOOM) splits the Web Mercator map into 2^z x 2^z
+tiles, and every tile into CELLS x CELLS cells. For each occupied cell the
+pyramid stores the record count, the dominant species and per-species and
+per-family counts.
+Pyramids are saved as .npz files and a tile lookup is a dict hit plus two
+array slices, so the map never rescans the occurrence frame while zooming.
+
+Build offline with:
+    python -m occurrence.tiles data/occurrence.arrow [--type "Tuna (Thunnus)"]
+"""
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .indexes import fish_type_preset, preset_slug
+
+MAX_ZOOM = 10
+CELL_BITS = 4
+CELLS = 1 << CELL_BITS  # cells per tile side
+MAX_MERCATOR_LAT = 85.05112878
+PYRAMID_FORMAT = 2
+
+
+def tile_slug(fish_type: Optional[str]) -> str:
+    """
+    File-name friendly key for the preset a fish type resolves to
+    ("Tuna (Thunnus)" -> "tuna-thunnus"; unknown labels -> "all-fish").
+    """
+    return preset_slug(fish_type)
+
+
+def mercator_xy(lats: np.ndarray, lngs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized Web Mercator coordinates in [0, 1) (y grows southwards)."""
+    lat = np.radians(np.clip(lats.astype(np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (lngs.astype(np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0
+    limit = np.nextafter(1.0, 0.0)
+    return np.clip(x, 0.0, limit), np.clip(y, 0.0, limit)
+
+
+def mercator_lat(y: float) -> float:
+    """Latitude of a normalized Web Mercator y coordinate."""
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+def _group_counts(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return np.unique(keys, return_counts=True)
+
+
+class TilePyramid:
+    """Per-zoom aggregated cells, sorted by tile, with an O(1) tile directory."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], version: str = ""):
+        self.arrays = arrays
+        self.version = version
+        self.species = [str(name) for name in arrays['species']]
+        self.families = [str(name) for name in arrays['families']]
+        # tile directory per zoom: (x, y) -> (first cell, last cell + 1)
+        self._directory: List[Dict[Tuple[int, int], Tuple[int, int]]] = []
+        for z in range(MAX_ZOOM + 1):
+            tiles = arrays[f'z{z}_tile']
+            unique, starts = np.unique(tiles, return_index=True)
+            stops = np.append(starts[1:], len(tiles))
+            side = 1 << z
+            self._directory.append({
+                (int(t % side), int(t // side)): (int(a), int(b))
+                for t, a, b in zip(unique, starts, stops)
+            })
+
+    @classmethod
+    def build(
+        cls,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        species_codes: np.ndarray,
+        species: List[str],
+        family_codes: np.ndarray,
+        families: List[str],
+        version: str = "",
+    ) -> "TilePyramid":
+        """Aggregate points into every zoom level (codes of -1 mean unknown)."""
+        x, y = mercator_xy(lats, lngs)
+        n_species = len(species) + 1
+        n_families = len(families) + 1
+        species_codes = species_codes.astype(np.int64) + 1
+        family_codes = family_codes.astype(np.int64) + 1
+
+        arrays: Dict[str, np.ndarray] = {
+            'format': np.array([PYRAMID_FORMAT]),
+            'species': np.array(['Unknown'] + list(species), dtype=str),
+            'families': np.array(['Unknown'] + list(families), dtype=str),
+        }
+        for z in range(MAX_ZOOM + 1):
+            side = 1 << (z + CELL_BITS)
+            gx = (x * side).astype(np.int64)
+            gy = (y * side).astype(np.int64)
+            # Global cell key orders cells by tile first (tile row, tile col), then cell inside the tile
+            tile = (gy >> CELL_BITS) * (1 << z) + (gx >> CELL_BITS)
+            local = (gy & (CELLS - 1)) * CELLS + (gx & (CELLS - 1))
+            cell_keys = tile * (CELLS * CELLS) + local
+
+            cells, counts = _group_counts(cell_keys)
+            cell_index = np.searchsorted(cells, cell_keys)
+
+            # Dominant species: highest (cell, species) count per cell
+            pairs, pair_counts = _group_counts(cell_index * n_species + species_codes)
+            pair_cells = pairs // n_species
+            order = np.lexsort((pairs % n_species, -pair_counts, pair_cells))
+            first = np.searchsorted(pair_cells[order], np.arange(len(cells)))
+            dominant = (pairs % n_species)[order][first]
+
+            fam_pairs, fam_counts = _group_counts(cell_index * n_families + family_codes)
+            fam_cells = fam_pairs // n_families
+
+            arrays[f'z{z}_tile'] = (cells // (CELLS * CELLS)).astype(np.uint32)
+            arrays[f'z{z}_cell'] = (cells % (CELLS * CELLS)).astype(np.uint8)
+            arrays[f'z{z}_count'] = counts.astype(np.uint32)
+            arrays[f'z{z}_dominant'] = dominant.astype(np.uint32)
+            # Species and family entries are grouped by cell; *_offsets[i]..*_offsets[i + 1] belongs to cell i
+            arrays[f'z{z}_sp_offsets'] = np.searchsorted(pair_cells, np.arange(len(cells) + 1)).astype(np.uint32)
+            arrays[f'z{z}_sp'] = (pairs % n_species).astype(np.uint32)
+            arrays[f'z{z}_sp_count'] = pair_counts.astype(np.uint32)
+            arrays[f'z{z}_fam_offsets'] = np.searchsorted(fam_cells, np.arange(len(cells) + 1)).astype(np.uint32)
+            arrays[f'z{z}_fam'] = (fam_pairs % n_families).astype(np.uint32)
+            arrays[f'z{z}_fam_count'] = fam_counts.astype(np.uint32)
+        return cls(arrays, version)
+
+    @classmethod
+    def from_store(cls, store, fish_type: Optional[str] = None) -> "TilePyramid":
+        """Build a pyramid over the store rows matching a fish type filter."""
+        rows = store.select(fish_type)
+        df = store.df
+        return cls.build(
+            df['decimalLatitude'].to_numpy()[rows],
+            df['decimalLongitude'].to_numpy()[rows],
+            df['scientificName'].cat.codes.to_numpy()[rows],
+            list(df['scientificName'].cat.categories),
+            df['family'].cat.codes.to_numpy()[rows],
+            list(df['family'].cat.categories),
+            version=store.version,
+        )
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp file: several workers may build the same pyramid at once
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, version=np.array(self.version), **self.arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TilePyramid":
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        version = str(arrays.pop('version'))
+        if int(arrays['format'][0]) != PYRAMID_FORMAT:
+            raise ValueError(f"Unsupported tile pyramid format in {path}")
+        return cls(arrays, version)
+
+    def tile(self, z: int, x: int, y: int) -> List[dict]:
+        """Aggregated cells of one tile (empty list when the tile has no records)."""
+        span = self._directory[z].get((x, y))
+        if span is None:
+            return []
+        start, stop = span
+        a = self.arrays
+        cells = a[f'z{z}_cell'][start:stop]
+        counts = a[f'z{z}_count'][start:stop]
+        dominant = a[f'z{z}_dominant'][start:stop]
+        sp_offsets = a[f'z{z}_sp_offsets'][start:stop + 1]
+        sps = a[f'z{z}_sp']
+        sp_counts = a[f'z{z}_sp_count']
+        offsets = a[f'z{z}_fam_offsets'][start:stop + 1]
+        fams = a[f'z{z}_fam']
+        fam_counts = a[f'z{z}_fam_count']
+
+        side = 1 << (z + CELL_BITS)
+        result = []
+        for i, cell in enumerate(cells):
+            cx, cy = int(cell) % CELLS, int(cell) // CELLS
+            gx, gy = x * CELLS + cx, y * CELLS + cy
+            sp_lo, sp_hi = int(sp_offsets[i]), int(sp_offsets[i + 1])
+            lo, hi = int(offsets[i]), int(offsets[i + 1])
+            result.append({
+                "x": cx,
+                "y": cy,
+                "centerLat": mercator_lat((gy + 0.5) / side),
+                "centerLng": (gx + 0.5) / side * 360.0 - 180.0,
+                "count": int(counts[i]),
+                "dominantSpecies": self.species[dominant[i]],
+                "species": {self.species[sp]: int(c) for sp, c in zip(sps[sp_lo:sp_hi], sp_counts[sp_lo:sp_hi])},
+                "families": {self.families[f]: int(c) for f, c in zip(fams[lo:hi], fam_counts[lo:hi])},
+            })
+        return result
+
+
+def load_or_build(store, fish_type: Optional[str], directory: Union[str, Path]) -> TilePyramid:
+    """Load the pyramid for a fish type from disk, rebuilding it if it is missing or stale."""
+    path = Path(directory) / f"{tile_slug(fish_type)}.npz"
+    if path.exists():
+        try:
+            pyramid = TilePyramid.load(path)
+            if pyramid.version == store.version:
+                return pyramid
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable tile pyramid {path}: {e}")
+    pyramid = TilePyramid.from_store(store, fish_type_preset(fish_type))
+    pyramid.save(path)
+    return pyramid
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .segments import apply_segments
+    from .store import OccurrenceStore
+
+    parser = argparse.ArgumentParser(description="Build the occurrence tile pyramid")
+    parser.add_argument("data", help="Base dataset (occurrence.arrow or occurrence_parsed.csv)")
+    parser.add_argument("--type", default=None, help="Fish type filter, e.g. 'Tuna (Thunnus)'")
+    parser.add_argument("--out", default=str(Path(__file__).parent.parent / "data" / "tiles"))
+    parser.add_argument("--segments", default=str(Path(__file__).parent.parent / "data" / "segments"))
+    args = parser.parse_args()
+
+    # Same store (and version) the API serves, so it reuses the pyramid instead of rebuilding it
+    occurrence_store = OccurrenceStore.load(args.data)
+    occurrence_store = apply_segments(occurrence_store, args.segments) or occurrence_store
+    built = load_or_build(occurrence_store, args.type, args.out)
+    cells = sum(len(built.arrays[f'z{z}_cell']) for z in range(MAX_ZOOM + 1))
+    print(f"Tile pyramid for {args.type or 'All Fish'}: {cells} cells across z0-z{MAX_ZOOM} -> {args.out}")
@@ -26,6 +26,8 @@ export default function AIAssistant({ onClose, ctsData }: AIAssistantProps) {
   ]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  // Server-side chat session, so follow-up turns only send the new message to the model
+  const [conversationId, setConversationId] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const scrollToBottom = () => {
@@ -48,7 +50,8 @@ export default function AIAssistant({ onClose, ctsData }: AIAssistantProps) {
             severity: ctsData.severity,
             gripStrength: ctsData.gripStrength,
             pinchStrength: ctsData.pinchStrength
-          } : null
+          } : null,
+          conversation_id: conversationId
         })
       });
 
@@ -58,6 +61,7 @@ export default function AIAssistant({ onClose, ctsData }: AIAssistantProps) {
       }
 
       const data = await response.json();
+      if (data.conversation_id) setConversationId(data.conversation_id);
       return data.response;
     } catch (error) {
       console.error('AI API error:', error);